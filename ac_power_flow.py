@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Newton-Raphson AC Power Flow
+Solves bus voltage magnitudes and angles with a sparse Jacobian, reusing
+the admittance matrix while the topology is unchanged and warm-starting
+from the previous step's voltages so a frame usually needs 1-2 iterations
+"""
+
+import time
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+LOAD_POWER_FACTOR = 0.95  # Lagging power factor applied to every load
+VOLTAGE_SETPOINT_PU = 1.0  # Generator (PV) and slack bus voltage
+TOLERANCE_PU = 1e-8  # Largest power mismatch accepted as converged
+MAX_ITERATIONS = 20
+
+
+class ACPowerFlow:
+    def __init__(self, network, tolerance=TOLERANCE_PU, max_iterations=MAX_ITERATIONS):
+        """Initialize the solver for a network with a DC power flow (topology, slack buses, per-unit base)"""
+        self.network = network
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+
+        self._cache_key = None
+        self.ybus = None
+        self.voltage = None  # Complex bus voltages (pu) of the last solve, used as the next start
+
+        # Results and metrics of the last solve
+        self.converged = False
+        self.iterations = 0
+        self.mismatch = 0.0
+        self.solve_time_ms = 0.0
+
+    def _build(self):
+        """Bus admittance matrix and bus types (slack, PV with generation, PQ)"""
+        network = self.network
+        dc = network.dc_power_flow
+        dc.ptdf  # refresh topology if needed
+        lines = network.lines
+
+        z_base = dc.base_impedance()
+        r_pu = lines.column('resistance').astype(np.float64) / z_base
+        x_pu = dc.line_reactance_pu()
+        z = r_pu + 1j * x_pu
+        y = np.where(dc.in_service() & (np.abs(z) > 0), 1.0 / np.where(np.abs(z) > 0, z, 1.0), 0.0)
+        self.line_admittance = y
+        self.ybus = (dc.incidence.T @ sparse.diags(y) @ dc.incidence).tocsr()
+
+        n_bus = len(network.buses)
+        is_slack = np.zeros(n_bus, dtype=bool)
+        is_slack[dc.slack_buses] = True
+        has_generation = np.bincount(network.generator_bus_index, network.generators.column('capacity_mw'),
+                                     minlength=n_bus) > 0
+        self.slack = np.flatnonzero(is_slack)
+        self.pv = np.flatnonzero(has_generation & ~is_slack)
+        self.pq = np.flatnonzero(~has_generation & ~is_slack)
+        self.pvpq = np.concatenate([self.pv, self.pq])
+
+        if self.voltage is None or len(self.voltage) != n_bus:
+            self.voltage = np.ones(n_bus, dtype=complex)
+        self.voltage[self.slack] = VOLTAGE_SETPOINT_PU * np.exp(1j * np.angle(self.voltage[self.slack]))
+        self.voltage[self.pv] = VOLTAGE_SETPOINT_PU * np.exp(1j * np.angle(self.voltage[self.pv]))
+
+        self._cache_key = dc.topology_version
+
+    def _jacobian(self, V):
+        """Sparse Jacobian of the power mismatch w.r.t. angles (PV, PQ) and magnitudes (PQ)"""
+        current = self.ybus @ V
+        diag_v = sparse.diags(V)
+        diag_i = sparse.diags(current)
+        diag_vnorm = sparse.diags(V / np.abs(V))
+
+        ds_dvm = diag_v @ (self.ybus @ diag_vnorm).conj() + diag_i.conj() @ diag_vnorm
+        ds_dva = 1j * diag_v @ (diag_i - self.ybus @ diag_v).conj()
+
+        ds_dva = ds_dva.tocsr()
+        ds_dvm = ds_dvm.tocsr()
+        pvpq, pq = self.pvpq, self.pq
+        return sparse.vstack([
+            sparse.hstack([ds_dva[pvpq][:, pvpq].real, ds_dvm[pvpq][:, pq].real]),
+            sparse.hstack([ds_dva[pq][:, pvpq].imag, ds_dvm[pq][:, pq].imag])
+        ]).tocsc()
+
+    def solve(self, bus_injection_mw, bus_load_mw):
+        """
+        Solve the AC power flow for one step.
+
+        Args:
+            bus_injection_mw (array): Net active injection per bus (generation - load).
+            bus_load_mw (array): Active load per bus; reactive load follows LOAD_POWER_FACTOR.
+
+        Returns complex bus voltages in per unit.
+        """
+        if self._cache_key != self.network.dc_power_flow.topology_version or self.ybus is None:
+            self._build()
+
+        base_mva = self.network.dc_power_flow.base_mva
+        q_load = np.asarray(bus_load_mw) * np.tan(np.arccos(LOAD_POWER_FACTOR))
+        s_spec = (np.asarray(bus_injection_mw) - 1j * q_load) / base_mva
+
+        start = time.perf_counter()
+        V = self.voltage.copy()
+        n_pvpq, n_pq = len(self.pvpq), len(self.pq)
+        self.converged = False
+        self.iterations = 0
+        for iteration in range(self.max_iterations + 1):
+            mismatch = V * np.conj(self.ybus @ V) - s_spec
+            f = np.concatenate([mismatch[self.pvpq].real, mismatch[self.pq].imag])
+            self.mismatch = float(np.abs(f).max()) if len(f) else 0.0
+            if self.mismatch < self.tolerance:
+                self.converged = True
+                break
+            if iteration == self.max_iterations:
+                break
+
+            dx = spsolve(self._jacobian(V), -f, permc_spec='MMD_AT_PLUS_A')
+            angle = np.angle(V)
+            magnitude = np.abs(V)
+            angle[self.pvpq] += dx[:n_pvpq]
+            magnitude[self.pq] += dx[n_pvpq:n_pvpq + n_pq]
+            V = magnitude * np.exp(1j * angle)
+            self.iterations += 1
+        self.solve_time_ms = (time.perf_counter() - start) * 1000
+
+        # Only warm-start from a converged state
+        if self.converged:
+            self.voltage = V
+        return V
+
+    def line_flows(self, V=None):
+        """Active power flow in MW at the 'from' end of every line"""
+        V = self.voltage if V is None else V
+        dc = self.network.dc_power_flow
+        v_from = V[dc.from_index]
+        v_to = V[dc.to_index]
+        s_from = v_from * np.conj(self.line_admittance * (v_from - v_to))
+        return s_from.real * dc.base_mva
+
+    def losses_mw(self, V=None):
+        """Total active losses in MW"""
+        V = self.voltage if V is None else V
+        return float((V * np.conj(self.ybus @ V)).real.sum() * self.network.dc_power_flow.base_mva)
+
+
+def test_ac_power_flow():
+    """Run a 24-hour AC study and report voltages at the traffic distribution buses"""
+    print("=" * 60)
+    print("Testing Newton-Raphson AC Power Flow")
+    print("=" * 60)
+
+    from pypsa_network_builder import NYCPowerNetworkSimple
+
+    network = NYCPowerNetworkSimple()
+    network.build_network()
+    network.set_power_flow_mode('ac')
+
+    iterations = []
+    for hour in range(24):
+        network.current_hour = hour
+        network.simulate_power_flow()
+        ac = network.ac_power_flow
+        iterations.append(ac.iterations)
+        if hour % 6 == 0:
+            voltages = network.get_bus_voltages()
+            print(f"\nHour {hour:02d}: {ac.iterations} iterations, {ac.solve_time_ms:.2f} ms, "
+                  f"losses {ac.losses_mw():.2f} MW")
+            for bus in ('Traffic_Manhattan', 'Traffic_Brooklyn', 'Traffic_Queens'):
+                print(f"  {bus}: {voltages[bus]:.4f} pu")
+
+    print(f"\nIterations per step: {iterations}")
+
+    # A failed solve reports unknown voltages instead of keeping the last ones
+    network.ac_power_flow.max_iterations = 0
+    network.power_flow_cache.clear()
+    network.current_hour = 12
+    network.simulate_power_flow()
+    status = network.get_status()
+    print(f"Without iterations: converged {status['power_flow_converged']}, "
+          f"Traffic_Manhattan voltage {status['bus_voltages_pu']['Traffic_Manhattan']}")
+    return network
+
+if __name__ == "__main__":
+    test_ac_power_flow()
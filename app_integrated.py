@@ -4,7 +4,7 @@ SUMOxPyPSA Integrated Application
 Professional Real-time Traffic-Power Grid Simulation
 """
 
-from flask import Flask, render_template, send_from_directory
+from flask import Flask, render_template, send_from_directory, request, jsonify
 from flask_socketio import SocketIO, emit
 import traci
 import time
@@ -13,12 +13,22 @@ import os
 import sys
 import random
 import math
+import zlib
+from collections import deque
+import numpy as np
 from config import *
 from sumo_config import SUMO_COMMON_CONFIG, CITY_CONFIGS as SUMO_CITY_CONFIGS
 
 # Import power network components
-from pypsa_network_builder import NYCPowerNetworkSimple
-from traffic_power_integration import TrafficPowerCoupler
+from gridkit_network import load_power_network
+from pypsa_network_builder import STREET_LIGHT_BY_HOUR
+from simulation_clock import SimulationClock
+from traffic_power_integration import TrafficPowerCoupler, encode_light_states
+from ev_charging_sessions import ChargingSessionEngine, QUEUED
+from state_snapshots import CheckpointWriter
+from metric_history import MetricHistory
+from cosim_scheduler import CoSimulationScheduler
+from outage_coupling import TrafficLightOutageController
 
 app = Flask(__name__, static_url_path='/static', static_folder='static')
 app.config['SECRET_KEY'] = 'A34F6g7JK0c5N'
@@ -36,6 +46,19 @@ CURRENT_CITY = DEFAULT_CITY
 # Power network components
 power_network = None
 power_coupler = None
+power_scheduler = None  # Runs solve_power_model on its own thread at POWER_SOLVE_INTERVAL_S
+checkpoint_writer = None
+last_checkpoint_time = 0
+outage_requests = deque()  # Outage/restore requests from the UI, applied on the power worker
+power_updates = deque()  # (events, outage_actions) of every solve, drained by the traffic loop
+
+# Traffic-side clock: SUMO time drives the profile lookups of the estimate
+BASE_LOAD_BY_HOUR = [1900] * 6 + [2400] * 3 + [2200] * 8 + [2500] * 3 + [2200] * 4  # MW, night / peaks / normal
+simulation_clock = SimulationClock(start_offset_s=SIMULATION_START_HOUR * 3600)
+simulation_clock.add_hourly_profile('base_load_mw', BASE_LOAD_BY_HOUR)
+simulation_clock.add_hourly_profile('street_light', STREET_LIGHT_BY_HOUR)
+# The power model's own clock, set on the worker to the time of the frame being solved
+power_clock = SimulationClock(start_offset_s=SIMULATION_START_HOUR * 3600)
 
 # Traffic light tracking
 traffic_light_cycles = {}  # Track actual cycle times
@@ -43,24 +66,29 @@ traffic_light_locations = []
 
 # EV Stations and tracking
 EV_STATIONS_NYC = []
-ev_station_vehicles = {}  # Track ACTUAL vehicles at each station
-power_consumption_history = []
+charging_sessions = ChargingSessionEngine()  # Sessions, SoC and queues at each station
+power_history = MetricHistory(('total_load_mw', 'traffic_infrastructure_mw', 'ev_charging_mw', 'base_load_mw'))
 
 def initialize_power_network():
     """Initialize the power network for NYC"""
     global power_network, power_coupler
     
     print("Initializing NYC Power Network...")
-    power_network = NYCPowerNetworkSimple()
-    power_network.build_network()
+    # Uses the GridKit extract in POWER_NETWORK_DIR when present
+    power_network = load_power_network(POWER_NETWORK_DIR)
+    power_network.attach_clock(power_clock)
+    power_network.set_power_flow_mode(POWER_FLOW_MODE)
     
     # Realistic line capacities
-    power_network.lines['DL_Manhattan_Traffic']['capacity_mw'] = 250
-    power_network.lines['DL_Brooklyn_Traffic']['capacity_mw'] = 180
-    power_network.lines['DL_Queens_Traffic']['capacity_mw'] = 200
+    for line, capacity in (('DL_Manhattan_Traffic', 250), ('DL_Brooklyn_Traffic', 180), ('DL_Queens_Traffic', 200)):
+        if line in power_network.lines:
+            power_network.lines[line]['capacity_mw'] = capacity
     
     print("Initializing Traffic-Power Coupler...")
     power_coupler = TrafficPowerCoupler(power_network)
+    power_coupler.ev_share = EV_SHARE
+    power_coupler.use_zone_grid(NYC_ZONE_BOUNDS, os.path.join(CACHE_DIR, 'zone_grid_newyork.npz'))
+    power_coupler.use_bus_index()  # Traffic loads go to the nearest distribution bus
     
     print("Power network initialized successfully!")
     return power_network, power_coupler
@@ -241,87 +269,93 @@ def create_ev_stations_at_intersections():
         "Fordham Station", "Central Park West", "Union Square Hub"
     ]
     
-    # Select 15 well-distributed locations
-    step = len(traffic_light_locations) // 15
+    # Select EV_STATION_COUNT well-distributed locations
+    step = max(len(traffic_light_locations) // EV_STATION_COUNT, 1)
     
-    for i in range(0, min(len(traffic_light_locations), 15 * step), step):
-        if i < len(traffic_light_locations) and len(EV_STATIONS_NYC) < 15:
+    for i in range(0, min(len(traffic_light_locations), EV_STATION_COUNT * step), step):
+        if i < len(traffic_light_locations) and len(EV_STATIONS_NYC) < EV_STATION_COUNT:
             tl = traffic_light_locations[i]
-            station_name = station_names[len(EV_STATIONS_NYC)]
+            n = len(EV_STATIONS_NYC)
+            station_name = station_names[n] if n < len(station_names) else f"Charging Station {n + 1}"
             
             EV_STATIONS_NYC.append({
                 'id': f'ev_station_{len(EV_STATIONS_NYC)}',
                 'lat': tl['lat'],
                 'lon': tl['lon'],
                 'name': station_name,
-                'power': random.choice([150, 250, 350]),
-                'capacity': random.randint(8, 12)  # 8-12 charging spots
+                'power': random.choice(EV_STATION_POWER_KW),
+                'capacity': random.randint(*EV_STATION_PLUGS)  # Charging spots
             })
     
+    # Attach each station to the nearest EV charging load of the power network
+    load_keys = None
+    if power_network:
+        load_keys = [power_network.nearest_ev_charging_load(s['lat'], s['lon']) for s in EV_STATIONS_NYC]
+    charging_sessions.add_stations(EV_STATIONS_NYC, load_keys)
+    
     print(f"Created {len(EV_STATIONS_NYC)} EV charging stations")
 
-def calculate_actual_ev_charging():
-    """Calculate ACTUAL vehicles charging at stations based on real positions"""
-    global ev_station_vehicles
-    
-    ev_station_vehicles = {station['id']: [] for station in EV_STATIONS_NYC}
-    
+def calculate_actual_ev_charging(simulation_time, dt):
+    """Start charging sessions for EVs stopped at stations, end those of departed vehicles and advance all sessions"""
     # Get all vehicles
     all_vehicles = []
-    for vid in traci.vehicle.getIDList():
+    vehicle_ids = traci.vehicle.getIDList()
+    for vid in vehicle_ids:
         try:
             pos = traci.vehicle.getPosition(vid)
             gps = traci.simulation.convertGeo(*pos)
             speed = traci.vehicle.getSpeed(vid)
+            acceleration = traci.vehicle.getAcceleration(vid)
+            slope = traci.vehicle.getSlope(vid)
             
-            # 30% of vehicles are EVs
-            is_ev = hash(vid) % 100 < 30
+            # A stable hash (str hash() is salted per process) picks EV_SHARE of the vehicles
+            is_ev = zlib.crc32(vid.encode()) % 10000 < EV_SHARE * 10000
             
             all_vehicles.append({
                 'id': vid,
                 'lat': gps[1],
                 'lon': gps[0],
                 'speed': speed,
+                'acceleration': acceleration,
+                'slope': slope,
                 'is_ev': is_ev
             })
         except:
             continue
     
-    # Check which EVs are at stations
-    for vehicle in all_vehicles:
-        if not vehicle['is_ev']:
-            continue
-            
-        for station in EV_STATIONS_NYC:
-            # Simple distance check (in degrees, roughly)
-            lat_diff = abs(vehicle['lat'] - station['lat'])
-            lon_diff = abs(vehicle['lon'] - station['lon'])
-            
-            # Very close to station and stopped/slow
-            if lat_diff < 0.001 and lon_diff < 0.001 and vehicle['speed'] < 1.0:
-                # Check capacity
-                if len(ev_station_vehicles[station['id']]) < station['capacity']:
-                    ev_station_vehicles[station['id']].append(vehicle['id'])
-                    break  # Vehicle can only charge at one station
+    # Vehicles that left the simulation end their sessions and free their plugs
+    present = set(vehicle_ids)
+    charging_sessions.depart([vid for vid in charging_sessions.active_vehicles() if vid not in present],
+                             simulation_time)
+    
+    # Stopped/slow EVs very close to a station (in degrees, roughly) arrive there
+    candidates = [v for v in all_vehicles if v['is_ev'] and v['speed'] < 1.0]
+    if candidates and EV_STATIONS_NYC:
+        ev_lat = np.array([v['lat'] for v in candidates])
+        ev_lon = np.array([v['lon'] for v in candidates])
+        station_lat = np.array([s['lat'] for s in EV_STATIONS_NYC])
+        station_lon = np.array([s['lon'] for s in EV_STATIONS_NYC])
+        
+        distance = np.maximum(np.abs(ev_lat[:, None] - station_lat), np.abs(ev_lon[:, None] - station_lon))
+        nearest = distance.argmin(axis=1)
+        at_station = distance[np.arange(len(candidates)), nearest] < 0.001
+        
+        charging_sessions.arrive(
+            [v['id'] for v, hit in zip(candidates, at_station) if hit],
+            nearest[at_station],
+            simulation_time
+        )
+    
+    charging_sessions.step(simulation_time, dt)
     
     return all_vehicles
 
 def calculate_realistic_power_consumption(vehicles, traffic_lights, ev_charging_total):
     """Calculate realistic, dynamic power consumption"""
-    global power_consumption_history
-    
-    current_time = traci.simulation.getTime() if simulation_running else 0
+    current_time = simulation_clock.time_s if simulation_running else 0
     
-    # Base load with time-of-day variation
-    hour_of_day = (int(current_time) // 3600) % 24
-    if 6 <= hour_of_day < 9:  # Morning peak
-        base_load = 2400
-    elif 17 <= hour_of_day < 20:  # Evening peak
-        base_load = 2500
-    elif 0 <= hour_of_day < 6:  # Night
-        base_load = 1900
-    else:  # Normal hours
-        base_load = 2200
+    # Base load with time-of-day variation (morning/evening peaks, night)
+    base_load = simulation_clock.value('base_load_mw')
     
     # Add variation
     time_variation = math.sin(current_time / 200) * 50
@@ -330,7 +364,7 @@ def calculate_realistic_power_consumption(vehicles, traffic_lights, ev_charging_
     # Traffic infrastructure load
     traffic_base = 8.0  # Base traffic systems
     traffic_lights_load = len(traffic_lights) * 0.003  # 3kW per intersection
-    street_lights = 12.0 if hour_of_day < 6 or hour_of_day > 18 else 0
+    street_lights = 12.0 * simulation_clock.value('street_light')
     
     # Vehicle-related load
     vehicle_load = len(vehicles) * 0.2  # Traffic management systems
@@ -340,29 +374,86 @@ def calculate_realistic_power_consumption(vehicles, traffic_lights, ev_charging_
                  traffic_base + traffic_lights_load + street_lights + 
                  vehicle_load + ev_charging_total)
     
-    # Store history
-    power_consumption_history.append(total_load)
-    if len(power_consumption_history) > 100:
-        power_consumption_history.pop(0)
+    return record_power_data(current_time, {
+        'total_load_mw': total_load,
+        'traffic_infrastructure_mw': traffic_base + traffic_lights_load + street_lights,
+        'ev_charging_mw': ev_charging_total,
+        'base_load_mw': base_load
+    })
+
+def model_power_data(power_state, time_s):
+    """Dashboard power numbers at a frame time from the newest coupled power-model solve"""
+    power = power_state['result']['power']
+    ev_energy = power['ev_energy_by_area']
+    
+    return record_power_data(time_s, {
+        'total_load_mw': power['total_load_mw'],
+        'total_generation_mw': power['total_generation_mw'],
+        'traffic_infrastructure_mw': power['traffic_infrastructure_mw'],
+        'ev_charging_mw': power['ev_charging_mw'],
+        'base_load_mw': power['total_load_mw'] - power['traffic_infrastructure_mw'] - power['ev_charging_mw'],
+        'line_utilization': power['line_utilization'],
+        'bus_voltages_pu': power['bus_voltages_pu'],
+        'ev_energy': ev_energy,
+        'ev_driving_mw': sum(area['net_mw'] for area in ev_energy.values()),
+        'solved_at_s': power_state['time_s']
+    })
+
+def record_power_data(time_s, power_data):
+    """Store dashboard power numbers in the history and add the load trend"""
+    # Store history (ring buffer with 1 s / 1 min / 1 h rollups)
+    power_history.append(time_s, power_data)
     
     # Calculate trend
-    if len(power_consumption_history) > 10:
-        recent_avg = sum(power_consumption_history[-10:]) / 10
-        older_avg = sum(power_consumption_history[-20:-10]) / 10
-        trend = "increasing" if recent_avg > older_avg else "decreasing"
+    recent = power_history.latest('total_load_mw', 20)
+    if len(recent) > 10:
+        recent_avg = recent[-10:].sum() / 10
+        older_avg = recent[:-10].sum() / 10
+        power_data['trend'] = "increasing" if recent_avg > older_avg else "decreasing"
     else:
-        trend = "stable"
+        power_data['trend'] = "stable"
     
-    return {
-        'total_load_mw': total_load,
-        'traffic_infrastructure_mw': traffic_base + traffic_lights_load + street_lights,
-        'ev_charging_mw': ev_charging_total,
-        'base_load_mw': base_load,
-        'trend': trend
-    }
+    return power_data
+
+def solve_power_model(frame):
+    """Power-side step on the scheduler worker: station power, coupled solve and checkpoints"""
+    global checkpoint_writer, last_checkpoint_time
+    
+    # Solve for the frame's time, not wherever the traffic loop has moved the shared clock since
+    simulation_time = frame['simulation_time']
+    power_clock.set_time(simulation_time)
+    
+    # Outage requests from the UI; the lights to switch go back to the traffic loop with the result
+    outage_actions = []
+    while outage_requests:
+        request = outage_requests.popleft()
+        if request.get('type') == 'outage_restore':
+            outage_actions.append({'action': 'restore', **power_coupler.restore_power()})
+        else:
+            outage_actions.append({
+                'action': 'switch_off',
+                **power_coupler.simulate_power_outage(request.get('area'), request.get('lines'))
+            })
+    
+    power_coupler.set_station_power(frame['station_lat'], frame['station_lon'], frame['station_mw'])
+    # The coupler's status is shared for the tick, so the actions go on a shallow copy
+    status = dict(power_coupler.update_from_arrays(frame), outage_actions=outage_actions)
+    # Queued per solve: the traffic loop may read latest() only after several solves
+    if status['events'] or outage_actions:
+        power_updates.append((status['events'], outage_actions))
+    
+    # Incremental binary checkpoint (written on a background thread)
+    if CHECKPOINT_INTERVAL_S and simulation_time - last_checkpoint_time >= CHECKPOINT_INTERVAL_S:
+        if checkpoint_writer is None:
+            checkpoint_writer = CheckpointWriter(os.path.join(CHECKPOINT_DIR, frame['city']))
+        checkpoint_writer.checkpoint(power_network, power_coupler)
+        last_checkpoint_time = simulation_time
+    
+    return status
 
 def sumo_simulation(city=DEFAULT_CITY):
-    global simulation_running, power_coupler, power_network, EV_STATIONS_NYC, ev_station_vehicles
+    global simulation_running, power_coupler, power_network, EV_STATIONS_NYC, charging_sessions
+    global power_scheduler, checkpoint_writer, last_checkpoint_time
     
     if city not in CITY_CONFIGS:
         print(f"City {city} not found")
@@ -375,6 +466,8 @@ def sumo_simulation(city=DEFAULT_CITY):
     
     original_dir = os.getcwd()
     temp_cfg = None
+    checkpoint_writer = None
+    last_checkpoint_time = 0
     
     try:
         os.chdir(working_dir)
@@ -388,13 +481,24 @@ def sumo_simulation(city=DEFAULT_CITY):
         traci.start(sumo_cmd)
         print("Connected to SUMO successfully")
         
+        # Dark traffic lights during power outages, switched in batches per step
+        outage_controller = TrafficLightOutageController(traci.trafficlight)
+        
         step_counter = 0
         stations_created = False
+        power_over_budget = 0
+        power_updates.clear()  # Nothing left over from a previous run
+        
+        # The power model solves on its own worker, the traffic loop never waits for it
+        if power_coupler:
+            power_scheduler = CoSimulationScheduler(solve_power_model, POWER_SOLVE_INTERVAL_S).start()
         
         while traci.simulation.getMinExpectedNumber() > 0 and not stop_event.is_set():
             traci.simulationStep()
             step_counter += 1
             simulation_time = traci.simulation.getTime()
+            simulation_clock.set_time(simulation_time)
+            outage_controller.step()
             
             # Update traffic lights every 5 steps
             if step_counter % 5 == 0:
@@ -412,7 +516,9 @@ def sumo_simulation(city=DEFAULT_CITY):
                     stations_created = True
                 
                 # Get all vehicles and calculate actual EV charging
-                all_vehicles_data = calculate_actual_ev_charging()
+                all_vehicles_data = calculate_actual_ev_charging(
+                    simulation_time, UPDATE_FREQUENCY * traci.simulation.getDeltaT()
+                )
                 
                 # Prepare vehicle data for frontend
                 vehicles = []
@@ -439,20 +545,15 @@ def sumo_simulation(city=DEFAULT_CITY):
                     except:
                         continue
                 
-                # Calculate EV station data with ACTUAL vehicles
+                # Calculate EV station data from the charging sessions
                 ev_stations = []
-                total_ev_charging_mw = 0
+                station_mw = charging_sessions.station_power_mw()
+                charging_counts, queue_lengths = charging_sessions.station_counts()
+                total_ev_charging_mw = float(station_mw.sum())
                 
-                for station in EV_STATIONS_NYC:
-                    charging_vehicles = ev_station_vehicles.get(station['id'], [])
-                    num_charging = len(charging_vehicles)
-                    
-                    # Only count vehicles that actually exist
-                    num_charging = min(num_charging, station['capacity'])
-                    
+                for i, station in enumerate(EV_STATIONS_NYC):
+                    num_charging = int(charging_counts[i])
                     utilization = (num_charging / station['capacity']) * 100
-                    station_power_mw = (num_charging * 50) / 1000  # 50kW per vehicle
-                    total_ev_charging_mw += station_power_mw
                     
                     ev_stations.append({
                         'id': station['id'],
@@ -461,33 +562,71 @@ def sumo_simulation(city=DEFAULT_CITY):
                         'name': station['name'],
                         'power': station['power'],
                         'evs_charging': num_charging,
+                        'queue_length': int(queue_lengths[i]),
                         'max_capacity': station['capacity'],
                         'utilization': utilization,
-                        'charging_vehicles': charging_vehicles[:5]  # Show first 5 IDs
+                        'power_mw': round(float(station_mw[i]), 3),
+                        'charging_vehicles': charging_sessions.station_vehicles(station['id'])[:5]  # Show first 5 IDs
                     })
                 
-                # Calculate realistic power consumption
-                power_data = calculate_realistic_power_consumption(
-                    vehicles, traffic_lights, total_ev_charging_mw
-                )
+                # Hand the latest traffic aggregates to the power side when its cadence is due
+                power_start = time.perf_counter()
+                if power_scheduler and power_scheduler.due(simulation_time):
+                    # Struct-of-arrays frame, consumed by the coupler without per-vehicle dicts
+                    power_scheduler.submit(simulation_time, {
+                        'simulation_time': simulation_time,
+                        'vehicle_lat': np.array([v['lat'] for v in all_vehicles_data], dtype=np.float64),
+                        'vehicle_lon': np.array([v['lon'] for v in all_vehicles_data], dtype=np.float64),
+                        'vehicle_speed': np.array([v['speed'] for v in all_vehicles_data], dtype=np.float64),
+                        'vehicle_acceleration': np.array([v['acceleration'] for v in all_vehicles_data],
+                                                         dtype=np.float64),
+                        'vehicle_slope': np.array([v['slope'] for v in all_vehicles_data], dtype=np.float64),
+                        'vehicle_is_ev': np.array([v['is_ev'] for v in all_vehicles_data], dtype=bool),
+                        'light_ids': [tl['id'] for tl in traffic_lights],
+                        'light_lat': np.array([tl['y'] for tl in traffic_lights], dtype=np.float64),
+                        'light_lon': np.array([tl['x'] for tl in traffic_lights], dtype=np.float64),
+                        'light_state': encode_light_states([tl['state'] for tl in traffic_lights]),
+                        'station_lat': [station['lat'] for station in EV_STATIONS_NYC],
+                        'station_lon': [station['lon'] for station in EV_STATIONS_NYC],
+                        'station_mw': station_mw.copy(),
+                        'city': city
+                    })
+                power_state = power_scheduler.latest() if power_scheduler else None
                 
-                # Line utilization based on actual load
-                total_traffic_load = power_data['traffic_infrastructure_mw']
-                line_utilization = {
-                    'DL_Manhattan_Traffic': min(95, (total_traffic_load / 250) * 100 * 1.2),
-                    'DL_Brooklyn_Traffic': min(90, (total_traffic_load / 180) * 100 * 1.1),
-                    'DL_Queens_Traffic': min(85, (total_traffic_load / 200) * 100 * 1.0)
-                }
+                # Power numbers from the power model's newest solve (load flow, lines, EV energy),
+                # or an estimate for cities without a power network and before the first solve
+                if power_state:
+                    power_data = model_power_data(power_state, simulation_time)
+                else:
+                    power_data = calculate_realistic_power_consumption(
+                        vehicles, traffic_lights, total_ev_charging_mw
+                    )
+                    power_data['line_utilization'] = {}
+                power_data['ev_sessions'] = charging_sessions.get_statistics()
                 
-                power_data['line_utilization'] = line_utilization
+                # Power-side cost on the traffic thread, against the frame budget
+                power_frame_ms = (time.perf_counter() - power_start) * 1000
+                if power_frame_ms > POWER_FRAME_BUDGET_MS:
+                    power_over_budget += 1
+                if power_scheduler:
+                    power_data['timing'] = {
+                        'frame_ms': round(power_frame_ms, 2),
+                        'budget_ms': POWER_FRAME_BUDGET_MS,
+                        'frames_over_budget': power_over_budget,
+                        **power_scheduler.get_statistics()
+                    }
                 
                 # Debug output
                 if step_counter % 100 == 0:
-                    total_charging = sum(len(v) for v in ev_station_vehicles.values())
+                    total_charging = int(charging_counts.sum())
                     print(f"\n--- Step {step_counter} ---")
                     print(f"Vehicles: {len(vehicles)} total, {ev_count} EVs")
                     print(f"EV Charging: {total_charging} vehicles at stations")
                     print(f"Power: {power_data['total_load_mw']:.1f} MW total")
+                    if power_scheduler:
+                        print(f"Power model: {power_scheduler.solves} solves, {power_scheduler.last_solve_ms:.1f} ms/solve, "
+                              f"{power_frame_ms:.2f} ms/frame (budget {POWER_FRAME_BUDGET_MS} ms, "
+                              f"{power_over_budget} frames over)")
                     print(f"Traffic lights: {len(traffic_lights)} detected")
                     
                     # Show station details
@@ -495,6 +634,18 @@ def sumo_simulation(city=DEFAULT_CITY):
                         if station['evs_charging'] > 0:
                             print(f"  {station['name']}: {station['evs_charging']}/{station['max_capacity']} vehicles")
                 
+                # Power event transitions and outage switching of every solve since the last frame
+                power_events = []
+                while power_updates:
+                    events, outage_actions = power_updates.popleft()
+                    power_events.extend(events)
+                    for action in outage_actions:
+                        if action['action'] == 'restore':
+                            outage_controller.restore(action['light_ids'])
+                        else:
+                            outage_controller.switch_off(action['light_ids'])
+                        socketio.emit('power_event_result', {'message': action['message']})
+                
                 # Send data to frontend
                 emit_data = {
                     'vehicles': vehicles,
@@ -504,7 +655,8 @@ def sumo_simulation(city=DEFAULT_CITY):
                     'vehicle_count': len(vehicles),
                     'ev_count': ev_count,
                     'power': power_data,
-                    'power_events': []
+                    'power_model': power_state,
+                    'power_events': power_events
                 }
                 
                 socketio.emit('update', emit_data)
@@ -520,6 +672,12 @@ def sumo_simulation(city=DEFAULT_CITY):
     finally:
         if temp_cfg and os.path.exists(temp_cfg):
             os.unlink(temp_cfg)
+        if power_scheduler:
+            power_scheduler.stop()
+            power_scheduler = None
+        if checkpoint_writer:
+            checkpoint_writer.close()
+            checkpoint_writer = None
         os.chdir(original_dir)
         simulation_running = False
 
@@ -536,13 +694,14 @@ def handle_connect():
 
 @socketio.on('change_city')
 def handle_change_city(data):
-    global simulation_thread, CURRENT_CITY, EV_STATIONS_NYC
+    global simulation_thread, CURRENT_CITY, EV_STATIONS_NYC, charging_sessions
     
     city = data.get('city', DEFAULT_CITY)
     CURRENT_CITY = city
     
     # Reset
     EV_STATIONS_NYC = []
+    charging_sessions = ChargingSessionEngine()
     
     if city == 'newyork' and not power_network:
         initialize_power_network()
@@ -557,9 +716,10 @@ def handle_change_city(data):
 
 @socketio.on('restart')
 def handle_restart(data):
-    global simulation_thread, EV_STATIONS_NYC
+    global simulation_thread, EV_STATIONS_NYC, charging_sessions
     
     EV_STATIONS_NYC = []
+    charging_sessions = ChargingSessionEngine()
     
     if simulation_running:
         stop_event.set()
@@ -572,19 +732,54 @@ def handle_restart(data):
 @socketio.on('power_event')
 def handle_power_event(data):
     event_type = data.get('type')
-    if event_type == 'ev_station_click':
+    if event_type in ('outage_simulation', 'outage_restore'):
+        # Applied by the power worker with its next solve
+        if power_coupler and simulation_running:
+            outage_requests.append(data)
+        else:
+            socketio.emit('power_event_result', {'message': 'No power network for this simulation'})
+    elif event_type == 'ev_station_click':
         station_id = data.get('station_id')
         # Send actual vehicle IDs charging at this station
-        vehicles_at_station = ev_station_vehicles.get(station_id, [])
+        vehicles_at_station = charging_sessions.station_vehicles(station_id)
         socketio.emit('station_vehicles', {
             'station_id': station_id,
-            'vehicles': vehicles_at_station
+            'vehicles': vehicles_at_station,
+            'queued': charging_sessions.station_vehicles(station_id, state=QUEUED)
         })
 
+def query_history(params):
+    """Query the power (or coupler) history: source, metrics, resolution, start, end, max_points"""
+    history = power_coupler.metrics_history if params.get('source') == 'coupler' and power_coupler else power_history
+    metrics = params.get('metrics')
+    if isinstance(metrics, str):
+        metrics = [m for m in metrics.split(',') if m]
+    start, end, max_points = params.get('start'), params.get('end'), params.get('max_points')
+    return history.query(
+        metrics or None, params.get('resolution', '1min'),
+        float(start) if start is not None else None,
+        float(end) if end is not None else None,
+        int(max_points) if max_points else None
+    )
+
+@socketio.on('history_request')
+def handle_history_request(data):
+    try:
+        socketio.emit('history', query_history(data or {}))
+    except (KeyError, ValueError) as e:
+        socketio.emit('history', {'error': str(e)})
+
 @app.route('/')
 def index():
     return render_template('index_integrated.html')
 
+@app.route('/api/history')
+def api_history():
+    try:
+        return jsonify(query_history(request.args))
+    except (KeyError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
 if __name__ == "__main__":
     if DEFAULT_CITY == 'newyork':
         initialize_power_network()
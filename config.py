@@ -15,12 +15,39 @@ PORT = 8080       # Web server port
 SIMULATION_SPEED = 0.025  # Reduced for smoother movement
 UPDATE_FREQUENCY = 2     # Update every 2 frames for smoother movement
 
+# EV Charging Configuration
+EV_SHARE = 0.15                        # Fraction of vehicles that are electric
+EV_STATION_COUNT = 15                  # Public stations placed at intersections
+EV_STATION_POWER_KW = [150, 250, 350]  # Plug power options
+EV_STATION_PLUGS = (8, 12)             # Plugs per station (min, max)
+
+# Time of day at SUMO time 0 (the power model follows the SUMO clock)
+SIMULATION_START_HOUR = 0
+
+# Power flow model: 'ac' (Newton-Raphson, gives the bus voltages the voltage event rules need) or 'dc'
+POWER_FLOW_MODE = "ac"
+
+# Power solve cadence: simulated seconds between power-model solves on the worker thread
+POWER_SOLVE_INTERVAL_S = 1.0
+POWER_FRAME_BUDGET_MS = 5.0  # Power-side cost allowed per traffic frame (aggregation, hand-off, readout)
+
+# Binary checkpoints of the power model (0 disables)
+CHECKPOINT_INTERVAL_S = 60  # Simulated seconds between checkpoints
+
 # City paths are relative to the config file location
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 NYC_PATH = os.path.join(BASE_DIR, "new_york")
 MIAMI_PATH = os.path.join(BASE_DIR, "miami")
 LA_PATH = os.path.join(BASE_DIR, "los_angeles")
 
+# GridKit power network (buses.csv / lines.csv from map_to_power.py)
+POWER_NETWORK_DIR = os.path.join(BASE_DIR, "pypsa_network", "new_york")
+CHECKPOINT_DIR = os.path.join(BASE_DIR, "checkpoints")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")  # Rasterized zone grids per city
+
+# Extent of the NYC zone lookup grid (lat_min, lat_max, lon_min, lon_max)
+NYC_ZONE_BOUNDS = (40.49, 40.92, -74.27, -73.68)
+
 # City configurations
 CITY_CONFIGS = {
     "newyork": {
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Multi-Rate Co-Simulation Scheduler
+Runs the power solve on its own worker thread at a configurable cadence of
+simulated time. The traffic loop drops its latest aggregates into a
+single-value slot (older unsolved frames are replaced, never queued) and
+reads the newest timestamped power result without waiting
+"""
+
+import threading
+import time
+import traceback
+
+DEFAULT_INTERVAL_S = 1.0  # Simulated seconds between power solves
+
+
+class CoSimulationScheduler:
+    def __init__(self, solve, interval_s=DEFAULT_INTERVAL_S, background=True):
+        """
+        Initialize the scheduler.
+
+        Args:
+            solve (callable): solve(aggregates) -> result, run on the worker thread.
+                It should be the only code touching the power model while the scheduler runs.
+            interval_s (float): Simulated seconds between solves (0 solves every frame).
+            background (bool): Run solves on a worker thread, or inline in submit().
+        """
+        self.solve = solve
+        self.interval_s = interval_s
+        self.background = background
+
+        self._condition = threading.Condition()
+        self._slot = None  # Latest (time_s, aggregates) waiting for the worker
+        self._busy = False
+        self._running = False
+        self._thread = None
+        self._latest = None  # Newest published result, replaced as a whole
+
+        self.last_submit_time_s = None
+        self.submitted = 0
+        self.solves = 0
+        self.dropped = 0  # Frames replaced in the slot before the worker took them
+        self.errors = 0
+        self.last_error = None
+        self.last_solve_ms = 0.0
+
+    def start(self):
+        """Start the worker thread"""
+        if self.background and self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='power-solver', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Stop the worker after its current solve"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def due(self, time_s):
+        """Whether a frame at this simulated time should be submitted (cheap, call every frame)"""
+        last = self.last_submit_time_s
+        # Time going backwards means the traffic simulation restarted
+        return last is None or time_s < last or time_s - last >= self.interval_s
+
+    def submit(self, time_s, aggregates):
+        """Hand the latest traffic aggregates to the power side; returns False when not due"""
+        if not self.due(time_s):
+            return False
+        self.last_submit_time_s = time_s
+        self.submitted += 1
+
+        if not self.background:
+            self._solve_one(time_s, aggregates)
+            return True
+
+        with self._condition:
+            if self._slot is not None:
+                self.dropped += 1
+            self._slot = (time_s, aggregates)
+            self._condition.notify()
+        return True
+
+    def latest(self):
+        """
+        Newest published result, or None before the first solve.
+
+        A dict with the simulated time of the traffic frame it was solved for
+        (time_s), the solve result, solve_ms and the wall-clock publish time.
+        """
+        return self._latest
+
+    def wait_idle(self, timeout=None):
+        """Block until every submitted frame has been solved (for tests and shutdown)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._slot is not None or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._slot is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                time_s, aggregates = self._slot
+                self._slot = None
+                self._busy = True
+            try:
+                self._solve_one(time_s, aggregates)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _solve_one(self, time_s, aggregates):
+        start = time.perf_counter()
+        try:
+            result = self.solve(aggregates)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"Power solve error at t={time_s}: {self.last_error}")
+            traceback.print_exc()
+            return
+        self.last_solve_ms = (time.perf_counter() - start) * 1000
+        self.solves += 1
+        self._latest = {
+            'time_s': time_s,
+            'result': result,
+            'solve_ms': round(self.last_solve_ms, 2),
+            'published_at': time.time()
+        }
+
+    def get_statistics(self):
+        """Cadence and throughput metrics"""
+        latest = self._latest
+        return {
+            'interval_s': self.interval_s,
+            'submitted': self.submitted,
+            'solves': self.solves,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'last_solve_ms': round(self.last_solve_ms, 2),
+            'result_time_s': latest['time_s'] if latest else None
+        }
+
+
+def test_cosim_scheduler(sim_seconds=120, traffic_dt=0.1):
+    """Step traffic at 10 Hz while the power model solves every simulated second"""
+    print("=" * 60)
+    print("Testing Co-Simulation Scheduler")
+    print("=" * 60)
+
+    import numpy as np
+    from pypsa_network_builder import NYCPowerNetworkSimple
+    from traffic_power_integration import TrafficPowerCoupler
+
+    network = NYCPowerNetworkSimple()
+    network.build_network()
+    coupler = TrafficPowerCoupler(network)
+    scheduler = CoSimulationScheduler(coupler.update_from_sumo, interval_s=1.0).start()
+
+    rng = np.random.default_rng(0)
+    frame_ms = []
+    for step in range(int(sim_seconds / traffic_dt)):
+        start = time.perf_counter()
+        time_s = step * traffic_dt
+        if scheduler.due(time_s):
+            vehicles = [{'x': x, 'y': y} for x, y in zip(rng.uniform(-74.0, -73.8, 500), rng.uniform(40.6, 40.85, 500))]
+            scheduler.submit(time_s, {'vehicles': vehicles, 'traffic_lights': [], 'simulation_time': time_s})
+        power = scheduler.latest()  # Never waits for the solver
+        frame_ms.append((time.perf_counter() - start) * 1000)
+
+    scheduler.wait_idle(timeout=10)
+    scheduler.stop()
+
+    power = scheduler.latest()
+    print(f"Traffic frames: {len(frame_ms)}, max frame overhead {max(frame_ms):.2f} ms")
+    print(f"Scheduler: {scheduler.get_statistics()}")
+    print(f"Latest power state solved for t={power['time_s']:.1f} s: "
+          f"{power['result']['power']['total_load_mw']} MW")
+    return scheduler
+
+if __name__ == "__main__":
+    test_cosim_scheduler()
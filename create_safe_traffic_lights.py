@@ -3,11 +3,12 @@
 Create safe traffic light logic with proper coordination and random offsets
 """
 
-import gzip
 import xml.etree.ElementTree as ET
 import os
 import random
 
+from sumo_net_reader import iter_tl_logics
+
 def create_safe_traffic_light_logic(signal_count, tl_id, junction_offset=0):
     """Create safe traffic light logic with proper coordination"""
     
@@ -168,29 +169,25 @@ def create_safe_traffic_lights_for_city(city_dir):
     traffic_lights = {}
     junction_offsets = {}
     
-    with gzip.open(net_file, 'rt', encoding='utf-8') as f:
-        tree = ET.parse(f)
-        root = tree.getroot()
+    for tl in iter_tl_logics(net_file):
+        tl_id = tl.get('id')
+        if tl_id is None:
+            continue
         
-        for tl in root.findall('tlLogic'):
-            tl_id = tl.get('id')
-            if tl_id is None:
-                continue
-            
-            phases = tl.findall('phase')
-            if not phases:
-                continue
-                
-            signal_count = len(phases[0].get('state'))
-            
-            # Generate random offset for this junction (0-300 seconds)
-            # Use tl_id to ensure consistent offset for the same junction
-            random.seed(hash(tl_id) % 10000)
-            junction_offset = random.randint(0, 300)
+        phases = tl['phases']
+        if not phases:
+            continue
             
-            # Create safe logic for this traffic light
-            traffic_lights[tl_id] = create_safe_traffic_light_logic(signal_count, tl_id, junction_offset)
-            junction_offsets[tl_id] = junction_offset
+        signal_count = len(phases[0].get('state'))
+        
+        # Generate random offset for this junction (0-300 seconds)
+        # Use tl_id to ensure consistent offset for the same junction
+        random.seed(hash(tl_id) % 10000)
+        junction_offset = random.randint(0, 300)
+        
+        # Create safe logic for this traffic light
+        traffic_lights[tl_id] = create_safe_traffic_light_logic(signal_count, tl_id, junction_offset)
+        junction_offsets[tl_id] = junction_offset
     
     print(f"  Created {len(traffic_lights)} safe traffic lights")
     
@@ -3,44 +3,41 @@
 Script to desynchronize traffic lights by adding random phase offsets
 """
 
-import gzip
 import xml.etree.ElementTree as ET
 import os
 import random
 
+from sumo_net_reader import iter_tl_logics
+
 def extract_and_desynchronize_traffic_lights(netfile):
     """Extract traffic lights and add random offsets to desynchronize them"""
     traffic_lights = {}
     
-    with gzip.open(netfile, 'rt', encoding='utf-8') as f:
-        tree = ET.parse(f)
-        root = tree.getroot()
-        
-        for tl in root.findall('tlLogic'):
-            tl_id = tl.get('id')
-            if tl_id is None:
-                continue
-                
-            phases = []
-            for phase in tl.findall('phase'):
-                duration = phase.get('duration')
-                state = phase.get('state')
-                if duration and state:
-                    phases.append({
-                        'duration': int(duration),
-                        'state': state
-                    })
+    for tl in iter_tl_logics(netfile):
+        tl_id = tl.get('id')
+        if tl_id is None:
+            continue
+            
+        phases = []
+        for phase in tl['phases']:
+            duration = phase.get('duration')
+            state = phase.get('state')
+            if duration and state:
+                phases.append({
+                    'duration': int(duration),
+                    'state': state
+                })
+        
+        if phases:
+            # Add random offset to desynchronize this traffic light
+            offset = random.randint(0, 40)  # Random offset between 0-40 seconds
             
-            if phases:
-                # Add random offset to desynchronize this traffic light
-                offset = random.randint(0, 40)  # Random offset between 0-40 seconds
-                
-                traffic_lights[tl_id] = {
-                    'type': tl.get('type', 'static'),
-                    'programID': tl.get('programID', '0'),
-                    'offset': offset,
-                    'phases': phases
-                }
+            traffic_lights[tl_id] = {
+                'type': tl.get('type', 'static'),
+                'programID': tl.get('programID', '0'),
+                'offset': offset,
+                'phases': phases
+            }
     
     return traffic_lights
 
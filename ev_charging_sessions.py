@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+EV Charging Session Engine
+Struct-of-arrays charging sessions with state of charge, dwell time and
+per-station queues, updated with vectorized NumPy operations every tick
+"""
+
+import time
+from collections import deque
+import numpy as np
+
+# Session states
+FREE = 0
+QUEUED = 1
+CHARGING = 2
+
+
+class ChargingSessionEngine:
+    def __init__(self, initial_capacity=1024, battery_kwh=75.0, target_soc=0.8,
+                 taper_soc=0.6, max_queue=10, max_wait_s=1800.0, rearrival_s=3600.0, seed=None):
+        """Initialize the charging session engine"""
+        self.battery_kwh = battery_kwh
+        self.target_soc = target_soc
+        self.taper_soc = taper_soc  # SoC above which charging power tapers off
+        self.max_queue = max_queue  # Waiting vehicles per station beyond the plugs; more are turned away
+        self.max_wait_s = max_wait_s  # Queued vehicles give up (renege) after this long
+        self.rearrival_s = rearrival_s  # Served or turned-away vehicles are not re-admitted for this long
+        self.rng = np.random.default_rng(seed)
+
+        # Station table
+        self.station_ids = []
+        self.station_index = {}
+        self.station_plug_kw = np.zeros(0)
+        self.station_plugs = np.zeros(0, dtype=np.int32)
+        self.station_load_keys = []
+
+        # Session table (struct of arrays, slots are reused after departure)
+        self.vehicle_ids = np.empty(initial_capacity, dtype=object)
+        self.state = np.zeros(initial_capacity, dtype=np.int8)
+        self.station = np.full(initial_capacity, -1, dtype=np.int32)
+        self.arrival_time = np.zeros(initial_capacity)
+        self.soc = np.zeros(initial_capacity)
+        self.soc_target = np.zeros(initial_capacity)
+        self.capacity_kwh = np.zeros(initial_capacity)
+        self.power_limit_kw = np.zeros(initial_capacity)
+        self.power_kw = np.zeros(initial_capacity)
+        self.queue_position = np.full(initial_capacity, -1, dtype=np.int32)
+        self.departure_time = np.full(initial_capacity, np.nan)
+
+        self._vehicle_slot = {}  # vehicle id -> slot for active sessions
+        self._served = {}  # vehicle id -> time it finished, gave up or was turned away
+        self._served_order = deque()  # (time, vehicle id) in time order, for expiring _served
+        self._free_slots = list(range(initial_capacity - 1, -1, -1))
+
+        # Completed sessions (for dwell-time statistics)
+        self.completed_sessions = 0
+        self.abandoned_sessions = 0
+        self.turned_away = 0
+        self.total_dwell_time = 0.0
+        self.total_energy_kwh = 0.0
+
+    def add_stations(self, stations, load_keys=None):
+        """Register charging stations (dicts with 'id', 'power' in kW and 'capacity' plugs)"""
+        for i, station in enumerate(stations):
+            self.station_index[station['id']] = len(self.station_ids)
+            self.station_ids.append(station['id'])
+            self.station_load_keys.append(load_keys[i] if load_keys else None)
+
+        self.station_plug_kw = np.append(self.station_plug_kw, [s['power'] for s in stations]).astype(np.float64)
+        self.station_plugs = np.append(self.station_plugs, [s['capacity'] for s in stations]).astype(np.int32)
+
+    def _grow(self):
+        """Double the session table when all slots are in use"""
+        old = len(self.state)
+        new = old * 2
+        for name, fill in [('vehicle_ids', None), ('state', FREE), ('station', -1),
+                           ('arrival_time', 0.0), ('soc', 0.0), ('soc_target', 0.0),
+                           ('capacity_kwh', 0.0), ('power_limit_kw', 0.0), ('power_kw', 0.0),
+                           ('queue_position', -1), ('departure_time', np.nan)]:
+            column = getattr(self, name)
+            extended = np.empty(new, dtype=column.dtype)
+            extended[:old] = column
+            extended[old:] = fill
+            setattr(self, name, extended)
+        self._free_slots.extend(range(new - 1, old - 1, -1))
+
+    def arrive(self, vehicle_ids, station_indices, now, soc=None, power_limit_kw=None):
+        """
+        Start sessions for vehicles arriving at stations.
+
+        Vehicles already in a session or recently served are ignored. New
+        sessions join the station queue and are promoted to a plug on the
+        next step; arrivals at a station whose plugs and queue are full are
+        turned away. Returns the number of sessions created.
+        """
+        vehicle_ids = list(vehicle_ids)
+        station_indices = np.asarray(station_indices, dtype=np.int32)
+
+        new = [i for i, vid in enumerate(vehicle_ids)
+               if vid not in self._vehicle_slot and vid not in self._served]
+        if not new:
+            return 0
+
+        # Rank arrivals within each station after the vehicles already there
+        new = np.array(new, dtype=np.intp)
+        stations = station_indices[new]
+        n_stations = len(self.station_ids)
+        occupied = np.bincount(self.station[self.state != FREE], minlength=n_stations)
+        order = np.argsort(stations, kind='stable')
+        sorted_stations = stations[order]
+        rank = np.empty(len(new), dtype=np.intp)
+        rank[order] = np.arange(len(new)) - np.searchsorted(sorted_stations, sorted_stations, side='left')
+        admitted = occupied[stations] + rank < self.station_plugs[stations] + self.max_queue
+
+        for i in new[~admitted]:
+            self._mark_served(vehicle_ids[i], now)
+        self.turned_away += int((~admitted).sum())
+        new = new[admitted]
+        if not len(new):
+            return 0
+
+        while len(self._free_slots) < len(new):
+            self._grow()
+        slots = np.array([self._free_slots.pop() for _ in new], dtype=np.intp)
+
+        if soc is None:
+            soc = self.rng.uniform(0.15, 0.5, len(vehicle_ids))
+        if power_limit_kw is None:
+            power_limit_kw = self.rng.choice([50.0, 150.0, 250.0], len(vehicle_ids))
+
+        for slot, i in zip(slots, new):
+            self.vehicle_ids[slot] = vehicle_ids[i]
+            self._vehicle_slot[vehicle_ids[i]] = slot
+
+        self.state[slots] = QUEUED
+        self.station[slots] = station_indices[new]
+        self.arrival_time[slots] = now
+        self.soc[slots] = np.asarray(soc)[new]
+        self.soc_target[slots] = self.target_soc
+        self.capacity_kwh[slots] = self.battery_kwh
+        self.power_limit_kw[slots] = np.asarray(power_limit_kw)[new]
+        self.power_kw[slots] = 0.0
+        self.departure_time[slots] = np.nan
+
+        return len(new)
+
+    def _mark_served(self, vehicle_id, now):
+        """Keep a vehicle from starting another session until rearrival_s has passed"""
+        self._served[vehicle_id] = now
+        self._served_order.append((now, vehicle_id))
+
+    def _expire_served(self, now):
+        """Forget vehicles whose rearrival period is over"""
+        order = self._served_order
+        while order and order[0][0] <= now - self.rearrival_s:
+            time_s, vid = order.popleft()
+            # A vehicle marked again later keeps its newer entry
+            if self._served.get(vid) == time_s:
+                del self._served[vid]
+
+    def _end_sessions(self, slots, now, completed):
+        """Free the slots of finished (completed) or abandoned sessions"""
+        self.departure_time[slots] = now
+        if completed:
+            self.completed_sessions += len(slots)
+            self.total_dwell_time += (now - self.arrival_time[slots]).sum()
+        else:
+            self.abandoned_sessions += len(slots)
+        self.state[slots] = FREE
+        self.power_kw[slots] = 0.0
+        self.station[slots] = -1
+        self.queue_position[slots] = -1
+        for slot in slots:
+            vid = self.vehicle_ids[slot]
+            del self._vehicle_slot[vid]
+            self.vehicle_ids[slot] = None
+        self._free_slots.extend(slots.tolist())
+
+    def active_vehicles(self):
+        """IDs of vehicles charging or queued"""
+        return list(self._vehicle_slot)
+
+    def depart(self, vehicle_ids, now):
+        """
+        End the sessions of vehicles that left (e.g. are no longer in the
+        simulation). Charging vehicles count as completed sessions with the
+        energy they got so far, queued ones as abandoned. Returns the number
+        of sessions ended.
+        """
+        slots = np.array([self._vehicle_slot[vid] for vid in vehicle_ids if vid in self._vehicle_slot],
+                         dtype=np.intp)
+        if not len(slots):
+            return 0
+        charging = self.state[slots] == CHARGING
+        self._end_sessions(slots[charging], now, completed=True)
+        self._end_sessions(slots[~charging], now, completed=False)
+        return len(slots)
+
+    def step(self, now, dt):
+        """Advance all sessions by dt seconds: charge, depart, renege and promote queues"""
+        charging = self.state == CHARGING
+
+        # Charging power: vehicle limit, plug rating and linear taper near full
+        plug_kw = self.station_plug_kw[self.station[charging]]
+        soc = self.soc[charging]
+        taper = np.clip((1.0 - soc) / (1.0 - self.taper_soc), 0.1, 1.0)
+        power = np.minimum(self.power_limit_kw[charging], plug_kw) * taper
+        self.power_kw[charging] = power
+
+        energy_kwh = power * (dt / 3600.0)
+        self.soc[charging] = soc + energy_kwh / self.capacity_kwh[charging]
+        self.total_energy_kwh += energy_kwh.sum()
+
+        # Departures
+        done = charging & (self.soc >= self.soc_target)
+        if done.any():
+            done_slots = np.flatnonzero(done)
+            for slot in done_slots:
+                self._mark_served(self.vehicle_ids[slot], now)
+            self._end_sessions(done_slots, now, completed=True)
+
+        # Vehicles that waited too long give up
+        reneged = (self.state == QUEUED) & (now - self.arrival_time > self.max_wait_s)
+        if reneged.any():
+            reneged_slots = np.flatnonzero(reneged)
+            for slot in reneged_slots:
+                self._mark_served(self.vehicle_ids[slot], now)
+            self._end_sessions(reneged_slots, now, completed=False)
+
+        self._expire_served(now)
+        self._promote_queues()
+
+    def _promote_queues(self):
+        """Move queued vehicles onto free plugs in arrival order"""
+        queued = np.flatnonzero(self.state == QUEUED)
+        if len(queued) == 0:
+            return
+
+        n_stations = len(self.station_ids)
+        in_use = np.bincount(self.station[self.state == CHARGING], minlength=n_stations)
+        free_plugs = self.station_plugs - in_use
+
+        # Rank within each station's queue by arrival time
+        order = queued[np.lexsort((self.arrival_time[queued], self.station[queued]))]
+        stations = self.station[order]
+        group_start = np.searchsorted(stations, stations, side='left')
+        rank = np.arange(len(order)) - group_start
+
+        promote = rank < free_plugs[stations]
+        self.state[order[promote]] = CHARGING
+        self.queue_position[order[promote]] = -1
+        self.queue_position[order[~promote]] = (rank - free_plugs[stations])[~promote]
+
+    def station_power_mw(self):
+        """Current charging power per station in MW"""
+        charging = self.state == CHARGING
+        return np.bincount(self.station[charging], weights=self.power_kw[charging],
+                           minlength=len(self.station_ids)) * 0.001
+
+    def station_counts(self):
+        """Number of charging and queued vehicles per station"""
+        n_stations = len(self.station_ids)
+        charging = np.bincount(self.station[self.state == CHARGING], minlength=n_stations)
+        queued = np.bincount(self.station[self.state == QUEUED], minlength=n_stations)
+        return charging, queued
+
+    def load_mw_by_key(self):
+        """Aggregate station power to the power-network loads the stations are attached to"""
+        load_mw = {}
+        for key, mw in zip(self.station_load_keys, self.station_power_mw()):
+            if key is not None:
+                load_mw[key] = load_mw.get(key, 0.0) + float(mw)
+        return load_mw
+
+    def station_vehicles(self, station_id, state=CHARGING):
+        """Vehicle IDs currently charging (or queued) at a station"""
+        idx = self.station_index.get(station_id)
+        if idx is None:
+            return []
+        slots = np.flatnonzero((self.station == idx) & (self.state == state))
+        return list(self.vehicle_ids[slots])
+
+    def get_statistics(self):
+        """Fleet-wide session statistics"""
+        charging, queued = self.station_counts()
+        return {
+            'active_sessions': int(charging.sum()),
+            'queued_vehicles': int(queued.sum()),
+            'completed_sessions': self.completed_sessions,
+            'abandoned_sessions': self.abandoned_sessions,
+            'turned_away': self.turned_away,
+            'average_dwell_minutes': round(self.total_dwell_time / max(self.completed_sessions, 1) / 60, 1),
+            'energy_delivered_mwh': round(self.total_energy_kwh / 1000, 3),
+            'charging_mw': round(float(self.station_power_mw().sum()), 3)
+        }
+
+
+def test_session_engine():
+    """Benchmark the session engine with a large synthetic fleet"""
+    print("=" * 60)
+    print("Testing EV Charging Session Engine")
+    print("=" * 60)
+
+    rng = np.random.default_rng(7)
+    n_stations = 300
+    stations = [{'id': f'ev_station_{i}', 'power': rng.choice([150, 250, 350]), 'capacity': rng.integers(8, 13)}
+                for i in range(n_stations)]
+
+    engine = ChargingSessionEngine(seed=7)
+    engine.add_stations(stations)
+
+    now = 0.0
+    dt = 1.0
+    next_vehicle = 0
+    step_times = []
+    for _ in range(600):
+        # Steady stream of arrivals
+        n_arrivals = rng.poisson(40)
+        ids = [f'veh_{next_vehicle + i}' for i in range(n_arrivals)]
+        next_vehicle += n_arrivals
+        engine.arrive(ids, rng.integers(0, n_stations, n_arrivals), now)
+
+        start = time.perf_counter()
+        engine.step(now, dt)
+        step_times.append(time.perf_counter() - start)
+        now += dt
+
+    stats = engine.get_statistics()
+    print(f"{next_vehicle} arrivals at {n_stations} stations")
+    print(f"Mean step time: {np.mean(step_times) * 1000:.3f} ms")
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+
+    # One 150 kW plug with room for two waiting vehicles
+    small = ChargingSessionEngine(max_queue=2, seed=7)
+    small.add_stations([{'id': 'ev_station_small', 'power': 150, 'capacity': 1}])
+    created = small.arrive(['ev_0', 'ev_1', 'ev_2', 'ev_3', 'ev_4'], [0] * 5, 0.0,
+                           soc=[0.7, 0.3, 0.3, 0.3, 0.3], power_limit_kw=[250.0] * 5)
+    print(f"\nQueue cap: {created} of 5 arrivals admitted, {small.turned_away} turned away")
+
+    small.step(0.0, 1.0)  # Promotes ev_0 onto the plug
+    small.step(1.0, 1.0)
+    expected = 150 * (1 - 0.7) / (1 - small.taper_soc)
+    print(f"Tapered power at 70% SoC: {small.power_kw[small._vehicle_slot['ev_0']]:.1f} kW "
+          f"(expected {expected:.1f} kW)")
+
+    small.depart(['ev_0'], 2.0)
+    small.step(2.0, 1.0)
+    print(f"After ev_0 leaves: charging {small.station_vehicles('ev_station_small')}, "
+          f"queued {small.station_vehicles('ev_station_small', state=QUEUED)}")
+
+    small.step(small.max_wait_s + 1.0, 1.0)
+    print(f"After {small.max_wait_s / 60:.0f} min: {small.abandoned_sessions} gave up waiting, "
+          f"{len(small._served)} vehicles held back")
+    small.step(small.max_wait_s + small.rearrival_s + 2.0, 1.0)
+    print(f"After the rearrival period: {len(small._served)} vehicles held back")
+
+    return engine
+
+if __name__ == "__main__":
+    test_session_engine()
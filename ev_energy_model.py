@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Vectorized EV Energy Model
+Computes traction consumption and regenerative braking for every EV in a
+frame at once from NumPy arrays of speed, acceleration and road slope
+"""
+
+import time
+import numpy as np
+
+# Physical constants
+GRAVITY = 9.81          # m/s^2
+AIR_DENSITY = 1.2       # kg/m^3
+DEG_TO_RAD = np.pi / 180
+
+
+class EVEnergyModel:
+    def __init__(self, mass_kg=1800, drag_coefficient=0.28, frontal_area_m2=2.3,
+                 rolling_resistance=0.011, drivetrain_efficiency=0.90,
+                 regen_efficiency=0.65, regen_min_speed=2.0, auxiliary_kw=1.5):
+        """Initialize the EV energy model with fleet-average vehicle parameters"""
+        self.mass_kg = mass_kg
+        self.drag_coefficient = drag_coefficient
+        self.frontal_area_m2 = frontal_area_m2
+        self.rolling_resistance = rolling_resistance
+        self.drivetrain_efficiency = drivetrain_efficiency
+        self.regen_efficiency = regen_efficiency
+        self.regen_min_speed = regen_min_speed  # m/s, below this friction brakes take over
+        self.auxiliary_kw = auxiliary_kw  # HVAC, electronics
+
+        # Pre-computed coefficients
+        self._aero = 0.5 * AIR_DENSITY * drag_coefficient * frontal_area_m2
+        self._mg = mass_kg * GRAVITY
+        self._rolling = self._mg * rolling_resistance
+        self._motoring_gain = 1.0 / drivetrain_efficiency
+
+    def battery_power_kw(self, speed, acceleration, slope_deg=None):
+        """
+        Battery power per vehicle in kW (positive = consumption, negative = regeneration).
+
+        Args:
+            speed (array): Vehicle speed in m/s.
+            acceleration (array): Longitudinal acceleration in m/s^2.
+            slope_deg (array): Road slope in degrees as reported by SUMO (optional).
+        """
+        v = np.asarray(speed, dtype=np.float64)
+        a = np.asarray(acceleration, dtype=np.float64)
+
+        # Tractive force at the wheels (N)
+        force = self._aero * v * v
+        force += self.mass_kg * a
+        if slope_deg is None:
+            force += self._rolling
+        else:
+            # Road grades are small, so truncated series replace sin/cos
+            # (error below 1e-4 up to 15 degrees) at a fraction of the cost
+            theta = np.asarray(slope_deg, dtype=np.float64) * DEG_TO_RAD
+            theta_sq = theta * theta
+            force += self._rolling * (1.0 - 0.5 * theta_sq)
+            force += self._mg * theta * (1.0 - theta_sq / 6.0)
+
+        # Mechanical power (kW); motoring draws more than wheel power,
+        # regeneration recovers less and only above the blending speed
+        wheel_kw = force * v
+        wheel_kw *= 0.001
+        gain = np.where(wheel_kw >= 0, self._motoring_gain, self.regen_efficiency)
+        gain[(wheel_kw < 0) & (v <= self.regen_min_speed)] = 0.0
+        battery_kw = wheel_kw * gain
+        return battery_kw + self.auxiliary_kw
+
+    def aggregate_by_zone(self, battery_kw, zone_index, n_zones, weights=None):
+        """
+        Roll per-vehicle battery power up to zones/buses.
+
+        Vehicles with a negative zone index are ignored. Returns a dict of
+        per-zone arrays in MW for consumption, regeneration and net demand.
+        """
+        battery_kw = np.asarray(battery_kw, dtype=np.float64)
+        zone_index = np.asarray(zone_index, dtype=np.intp)
+        if weights is not None:
+            battery_kw = battery_kw * weights
+
+        valid = zone_index >= 0
+        zones = zone_index[valid]
+        power = battery_kw[valid]
+
+        consumption = np.bincount(zones, weights=np.maximum(power, 0.0), minlength=n_zones)
+        regeneration = np.bincount(zones, weights=np.maximum(-power, 0.0), minlength=n_zones)
+
+        return {
+            'consumption_mw': consumption * 0.001,
+            'regeneration_mw': regeneration * 0.001,
+            'net_mw': (consumption - regeneration) * 0.001
+        }
+
+    def zone_energy(self, speed, acceleration, slope_deg, zone_index, n_zones, weights=None):
+        """Compute battery power for all vehicles and roll it up by zone in one call"""
+        battery_kw = self.battery_power_kw(speed, acceleration, slope_deg)
+        return self.aggregate_by_zone(battery_kw, zone_index, n_zones, weights)
+
+
+def test_energy_model():
+    """Benchmark the energy model on a synthetic fleet"""
+    print("=" * 60)
+    print("Testing Vectorized EV Energy Model")
+    print("=" * 60)
+
+    rng = np.random.default_rng(42)
+    n_vehicles = 10000
+    n_zones = 4
+
+    speed = rng.uniform(0, 20, n_vehicles)
+    accel = rng.normal(0, 1.0, n_vehicles)
+    slope = rng.normal(0, 1.5, n_vehicles)
+    zones = rng.integers(-1, n_zones, n_vehicles)
+
+    model = EVEnergyModel()
+    model.zone_energy(speed, accel, slope, zones, n_zones)  # warm up
+
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = model.zone_energy(speed, accel, slope, zones, n_zones)
+    elapsed_ms = (time.perf_counter() - start) / runs * 1000
+
+    print(f"{n_vehicles} vehicles, {n_zones} zones: {elapsed_ms:.3f} ms per frame")
+    print(f"Consumption by zone (MW): {np.round(result['consumption_mw'], 3)}")
+    print(f"Regeneration by zone (MW): {np.round(result['regeneration_mw'], 3)}")
+    print(f"Net demand by zone (MW): {np.round(result['net_mw'], 3)}")
+
+    return model
+
+if __name__ == "__main__":
+    test_energy_model()
@@ -3,44 +3,33 @@
 Script to fix synchronized traffic lights at intersections by creating opposing logic
 """
 
-import gzip
 import xml.etree.ElementTree as ET
 import os
 import re
 
+from sumo_net_reader import iter_net
+
 def analyze_intersection_traffic_lights(netfile):
     """Analyze traffic lights to find which ones are at the same intersection"""
     intersections = {}
     
-    with gzip.open(netfile, 'rt', encoding='utf-8') as f:
-        tree = ET.parse(f)
-        root = tree.getroot()
-        
-        # First, get all traffic lights and their controlled links
-        traffic_lights = {}
-        for tl in root.findall('tlLogic'):
-            tl_id = tl.get('id')
+    # One streaming pass: traffic lights, the incoming edges of every junction,
+    # and the links each traffic light controls
+    traffic_lights = {}
+    junctions_by_edge = {}
+    for tag, record in iter_net(netfile):
+        if tag == 'tlLogic':
+            tl_id = record.get('id')
             if tl_id is None:
                 continue
             
-            # Get controlled links for this traffic light
-            controlled_links = []
-            for connection in root.findall('connection'):
-                if connection.get('tl') == tl_id:
-                    controlled_links.append({
-                        'from': connection.get('from'),
-                        'to': connection.get('to'),
-                        'fromLane': connection.get('fromLane'),
-                        'toLane': connection.get('toLane')
-                    })
-            
             traffic_lights[tl_id] = {
-                'controlled_links': controlled_links,
+                'controlled_links': [],
                 'phases': []
             }
             
             # Get phases
-            for phase in tl.findall('phase'):
+            for phase in record['phases']:
                 duration = phase.get('duration')
                 state = phase.get('state')
                 if duration and state:
@@ -49,27 +38,37 @@ def analyze_intersection_traffic_lights(netfile):
                         'state': state
                     })
         
-        # Group traffic lights by intersection (junction)
-        for tl_id, tl_info in traffic_lights.items():
-            if not tl_info['controlled_links']:
-                continue
-            
-            # Find the junction this traffic light controls
-            # We'll use the 'from' edge to find the junction
-            from_edge = tl_info['controlled_links'][0]['from']
-            
-            # Find the junction that connects this edge
-            for junction in root.findall('junction'):
-                junction_id = junction.get('id')
-                if junction_id:
-                    # Check if this junction has the from_edge as an incoming edge
-                    for inc in junction.findall('incLane'):
-                        edge_id = inc.get('id').split('_')[0]  # Remove lane suffix
-                        if edge_id == from_edge:
-                            if junction_id not in intersections:
-                                intersections[junction_id] = []
-                            intersections[junction_id].append(tl_id)
-                            break
+        elif tag == 'junction':
+            junction_id = record.get('id')
+            # Internal junctions sit inside an intersection, they are not intersections themselves
+            if junction_id and record.get('type') != 'internal':
+                # Incoming lanes are listed in the incLanes attribute; strip the lane suffix
+                for lane_id in record.get('incLanes', '').split():
+                    edge_id = lane_id.rsplit('_', 1)[0]
+                    junctions = junctions_by_edge.setdefault(edge_id, [])
+                    if junction_id not in junctions:
+                        junctions.append(junction_id)
+        
+        elif tag == 'connection' and record.get('tl') in traffic_lights:
+            traffic_lights[record['tl']]['controlled_links'].append({
+                'from': record.get('from'),
+                'to': record.get('to'),
+                'fromLane': record.get('fromLane'),
+                'toLane': record.get('toLane')
+            })
+    
+    # Group traffic lights by intersection (junction)
+    for tl_id, tl_info in traffic_lights.items():
+        if not tl_info['controlled_links']:
+            continue
+        
+        # Find the junction this traffic light controls
+        # We'll use the 'from' edge to find the junction
+        from_edge = tl_info['controlled_links'][0]['from']
+        for junction_id in junctions_by_edge.get(from_edge, ()):
+            if junction_id not in intersections:
+                intersections[junction_id] = []
+            intersections[junction_id].append(tl_id)
     
     return intersections, traffic_lights
 
@@ -3,38 +3,30 @@
 Script to fix traffic light logic by adding all-red phases and ensuring proper cycling
 """
 
-import gzip
 import xml.etree.ElementTree as ET
 import re
 import os
 
+from sumo_net_reader import rewrite_net
+
 def fix_traffic_light_logic(input_file, output_file):
     """
     Fix traffic light logic by adding all-red phases between direction changes
     """
     print(f"Processing {input_file}...")
-    
-    # Read the network file
-    with gzip.open(input_file, 'rt', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Parse XML
-    root = ET.fromstring(content)
-    
-    # Find all tlLogic elements
-    tllogics = root.findall('tlLogic')
-    print(f"Found {len(tllogics)} traffic light logics")
+    print(f"Writing fixed network to {output_file}...")
     
     fixed_count = 0
     
-    for tl in tllogics:
+    def fix_tl(tl):
+        nonlocal fixed_count
         tl_id = tl.get('id')
         print(f"\nProcessing traffic light: {tl_id}")
         
         phases = tl.findall('phase')
         if len(phases) < 2:
             print(f"  Skipping {tl_id}: insufficient phases")
-            continue
+            return
         
         # Get the state length from the first phase
         first_state = phases[0].get('state')
@@ -66,10 +58,11 @@ def fix_traffic_light_logic(input_file, output_file):
                     })
                     print(f"  Added all-red phase after phase {i+1}")
         
-        # Replace the phases in the XML
+        # Replace the phases in the XML (clear() also drops the attributes and tail)
+        attrib, tail = dict(tl.attrib), tl.tail
         tl.clear()
-        for attr, value in tl.attrib.items():
-            tl.set(attr, value)
+        tl.attrib.update(attrib)
+        tl.tail = tail
         
         for phase_data in new_phases:
             phase_elem = ET.SubElement(tl, 'phase')
@@ -79,20 +72,9 @@ def fix_traffic_light_logic(input_file, output_file):
         fixed_count += 1
         print(f"  Fixed {tl_id}: {len(phases)} phases -> {len(new_phases)} phases")
     
-    # Write the fixed network file
-    print(f"\nWriting fixed network to {output_file}...")
-    
-    # Create the XML tree
-    tree = ET.ElementTree(root)
-    
-    # Write to gzipped file
-    with gzip.open(output_file, 'wt', encoding='utf-8') as f:
-        # Write XML declaration
-        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-        
-        # Convert to string and write
-        xml_str = ET.tostring(root, encoding='unicode')
-        f.write(xml_str)
+    # Stream the network through, fixing each tlLogic on the way, into a gzipped file
+    total = rewrite_net(input_file, output_file, fix_tl, compress=True)
+    print(f"Found {total} traffic light logics")
     
     print(f"Fixed {fixed_count} traffic light logics")
     print(f"Output written to: {output_file}")
@@ -3,11 +3,12 @@
 Script to fix traffic light synchronization by adding random offsets and varying phase durations
 """
 
-import gzip
 import xml.etree.ElementTree as ET
 import os
 import random
 
+from sumo_net_reader import iter_tl_logics
+
 def create_desynchronized_traffic_light_logic(signal_count, tl_id):
     """Create traffic light logic with random offset and varied durations to break synchronization"""
     
@@ -163,23 +164,19 @@ def fix_traffic_synchronization_for_city(city_dir):
     # Create desynchronized traffic lights
     traffic_lights = {}
     
-    with gzip.open(net_file, 'rt', encoding='utf-8') as f:
-        tree = ET.parse(f)
-        root = tree.getroot()
+    for tl in iter_tl_logics(net_file):
+        tl_id = tl.get('id')
+        if tl_id is None:
+            continue
         
-        for tl in root.findall('tlLogic'):
-            tl_id = tl.get('id')
-            if tl_id is None:
-                continue
-            
-            phases = tl.findall('phase')
-            if not phases:
-                continue
-                
-            signal_count = len(phases[0].get('state'))
+        phases = tl['phases']
+        if not phases:
+            continue
             
-            # Create desynchronized logic for this traffic light
-            traffic_lights[tl_id] = create_desynchronized_traffic_light_logic(signal_count, tl_id)
+        signal_count = len(phases[0].get('state'))
+        
+        # Create desynchronized logic for this traffic light
+        traffic_lights[tl_id] = create_desynchronized_traffic_light_logic(signal_count, tl_id)
     
     print(f"  Created {len(traffic_lights)} desynchronized traffic lights")
     
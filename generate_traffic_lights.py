@@ -3,40 +3,37 @@
 Script to extract all traffic light IDs from network file and generate matching traffic_lights.add.xml
 """
 
-import gzip
 import xml.etree.ElementTree as ET
 import os
 
+from sumo_net_reader import iter_tl_logics
+
 def extract_traffic_light_info(netfile):
     """Extract all traffic light IDs and their current phases from network file"""
     traffic_lights = {}
     
-    with gzip.open(netfile, 'rt', encoding='utf-8') as f:
-        tree = ET.parse(f)
-        root = tree.getroot()
-        
-        for tl in root.findall('tlLogic'):
-            tl_id = tl.get('id')
-            if tl_id is None:
-                continue
-                
-            phases = []
-            for phase in tl.findall('phase'):
-                duration = phase.get('duration')
-                state = phase.get('state')
-                if duration and state:
-                    phases.append({
-                        'duration': int(duration),
-                        'state': state
-                    })
+    for tl in iter_tl_logics(netfile):
+        tl_id = tl.get('id')
+        if tl_id is None:
+            continue
             
-            if phases:
-                traffic_lights[tl_id] = {
-                    'type': tl.get('type', 'static'),
-                    'programID': tl.get('programID', '0'),
-                    'offset': tl.get('offset', '0'),
-                    'phases': phases
-                }
+        phases = []
+        for phase in tl['phases']:
+            duration = phase.get('duration')
+            state = phase.get('state')
+            if duration and state:
+                phases.append({
+                    'duration': int(duration),
+                    'state': state
+                })
+        
+        if phases:
+            traffic_lights[tl_id] = {
+                'type': tl.get('type', 'static'),
+                'programID': tl.get('programID', '0'),
+                'offset': tl.get('offset', '0'),
+                'phases': phases
+            }
     
     return traffic_lights
 
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Multi-Resolution Metric History
+Fixed-size NumPy ring buffers for raw samples plus automatic 1 s / 1 min /
+1 h rollups (min/mean/max), so dashboards can chart hours of history with
+constant memory and O(1) appends
+"""
+
+import numpy as np
+
+RAW_CAPACITY = 3600  # Raw samples kept
+ROLLUPS = (  # (name, period in seconds, buckets kept)
+    ('1s', 1, 3600),  # Last hour
+    ('1min', 60, 1440),  # Last day
+    ('1h', 3600, 720)  # Last 30 days
+)
+STATISTICS = ('min', 'mean', 'max')
+
+
+class RingBuffer:
+    def __init__(self, capacity, width):
+        """Circular buffer of (time, row) samples"""
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.values = np.zeros((capacity, width))
+        self.head = 0  # Next write position
+        self.size = 0
+
+    def append(self, time_s, row):
+        self.times[self.head] = time_s
+        self.values[self.head] = row
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def ordered(self):
+        """Times and rows, oldest first"""
+        index = (self.head - self.size + np.arange(self.size)) % self.capacity
+        return self.times[index], self.values[index]
+
+    def clear(self):
+        self.head = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+
+class _Rollup:
+    def __init__(self, period_s, capacity, width):
+        """One resolution level: closed buckets in a ring buffer plus the open bucket"""
+        self.period_s = period_s
+        self.buffer = RingBuffer(capacity, 3 * width)  # min | mean | max per field
+        self.bucket = None
+        self.count = 0
+        self.total = np.zeros(width)
+        self.low = np.zeros(width)
+        self.high = np.zeros(width)
+
+    def add(self, time_s, row):
+        bucket = np.floor(time_s / self.period_s)
+        if bucket != self.bucket:
+            self.flush()
+            self.bucket = bucket
+            self.count = 1
+            self.total[:] = row
+            self.low[:] = row
+            self.high[:] = row
+            return
+        self.count += 1
+        self.total += row
+        np.minimum(self.low, row, out=self.low)
+        np.maximum(self.high, row, out=self.high)
+
+    def current(self):
+        """min | mean | max row of the open bucket"""
+        return np.concatenate([self.low, self.total / self.count, self.high])
+
+    def flush(self):
+        if self.count:
+            self.buffer.append(self.bucket * self.period_s, self.current())
+        self.count = 0
+
+    def ordered(self):
+        """Closed buckets plus the open one, oldest first"""
+        times, rows = self.buffer.ordered()
+        if self.count:
+            times = np.append(times, self.bucket * self.period_s)
+            rows = np.vstack([rows, self.current()])
+        return times, rows
+
+    def clear(self):
+        self.buffer.clear()
+        self.bucket = None
+        self.count = 0
+
+    def load(self, times, rows, open_count=1):
+        """Restore from ordered() output: closed buckets, the last row reopened with open_count samples"""
+        self.clear()
+        if not len(times):
+            return
+        for time_s, row in zip(times[:-1], rows[:-1]):
+            self.buffer.append(time_s, row)
+        if open_count:
+            low, mean, high = np.split(np.asarray(rows[-1], dtype=np.float64), 3)
+            self.bucket = np.floor(times[-1] / self.period_s)
+            self.count = int(open_count)
+            self.low[:] = low
+            self.high[:] = high
+            self.total[:] = mean * self.count
+        else:
+            self.buffer.append(times[-1], rows[-1])
+
+
+class MetricHistory:
+    def __init__(self, fields, raw_capacity=RAW_CAPACITY, rollups=ROLLUPS):
+        """
+        Initialize an empty history.
+
+        Args:
+            fields (tuple): Metric names, one column each.
+            raw_capacity (int): Raw samples kept.
+            rollups (tuple): (name, period_s, capacity) per rollup resolution.
+        """
+        self.fields = tuple(fields)
+        self.field_index = {name: i for i, name in enumerate(self.fields)}
+        self.raw = RingBuffer(raw_capacity, len(self.fields))
+        self.rollups = {name: _Rollup(period, capacity, len(self.fields)) for name, period, capacity in rollups}
+        self.last_time_s = None
+
+    @property
+    def resolutions(self):
+        return ('raw',) + tuple(self.rollups)
+
+    def append(self, time_s, values):
+        """
+        Record one sample at a simulation time.
+
+        values is a {field: value} dict (missing fields are 0) or a sequence
+        in field order. A time earlier than the previous sample (simulation
+        restart) clears the history.
+        """
+        if isinstance(values, dict):
+            row = np.array([values.get(name, 0.0) for name in self.fields], dtype=np.float64)
+        else:
+            row = np.asarray(values, dtype=np.float64)
+        if self.last_time_s is not None and time_s < self.last_time_s:
+            self.clear()
+        self.last_time_s = time_s
+
+        self.raw.append(time_s, row)
+        for rollup in self.rollups.values():
+            rollup.add(time_s, row)
+
+    def latest(self, field, n):
+        """The last n raw values of a field, oldest first"""
+        _, rows = self.raw.ordered()
+        return rows[-n:, self.field_index[field]]
+
+    def __len__(self):
+        return len(self.raw)
+
+    def query(self, fields=None, resolution='1min', start_s=None, end_s=None, max_points=None):
+        """
+        History of some fields as JSON-ready lists.
+
+        Raw samples return one list per field; rollups return
+        {'min': [...], 'mean': [...], 'max': [...]} per field, with the
+        still-open bucket as the last point. max_points keeps the newest points.
+        """
+        if resolution == 'raw':
+            times, rows = self.raw.ordered()
+        elif resolution in self.rollups:
+            times, rows = self.rollups[resolution].ordered()
+        else:
+            raise ValueError(f"Unknown resolution: {resolution} (use one of {self.resolutions})")
+
+        mask = np.ones(len(times), dtype=bool)
+        if start_s is not None:
+            mask &= times >= start_s
+        if end_s is not None:
+            mask &= times <= end_s
+        times, rows = times[mask], rows[mask]
+        if max_points:
+            times, rows = times[-max_points:], rows[-max_points:]
+
+        result = {'resolution': resolution, 'time': times.tolist(), 'metrics': {}}
+        width = len(self.fields)
+        for name in (fields or self.fields):
+            i = self.field_index[name]
+            if resolution == 'raw':
+                result['metrics'][name] = rows[:, i].tolist()
+            else:
+                result['metrics'][name] = {
+                    stat: rows[:, k * width + i].tolist() for k, stat in enumerate(STATISTICS)
+                }
+        return result
+
+    def clear(self):
+        self.raw.clear()
+        for rollup in self.rollups.values():
+            rollup.clear()
+        self.last_time_s = None
+
+    def to_arrays(self):
+        """Buffer contents as {key: array}, for snapshots"""
+        arrays = {'fields': np.array(self.fields, dtype=str)}
+        arrays['raw/time'], arrays['raw/values'] = self.raw.ordered()
+        for name, rollup in self.rollups.items():
+            arrays[f'{name}/time'], arrays[f'{name}/values'] = rollup.ordered()
+            arrays[f'{name}/open_count'] = np.array(rollup.count)
+        return arrays
+
+    def load_arrays(self, arrays):
+        """Replay buffer contents written by to_arrays, reopening each rollup's open bucket"""
+        self.clear()
+        for time_s, row in zip(arrays['raw/time'], arrays['raw/values']):
+            self.raw.append(time_s, row)
+        for name, rollup in self.rollups.items():
+            # Older snapshots have no count; their last row was always the open bucket
+            rollup.load(arrays.get(f'{name}/time', np.zeros(0)),
+                        arrays.get(f'{name}/values', np.zeros((0, 3 * len(self.fields)))),
+                        int(arrays.get(f'{name}/open_count', 1)))
+        if len(self.raw):
+            self.last_time_s = float(arrays['raw/time'][-1])
+
+
+def test_metric_history(hours=3):
+    """Record 10 Hz samples for a few hours and query each resolution"""
+    print("=" * 60)
+    print("Testing Multi-Resolution Metric History")
+    print("=" * 60)
+
+    import time
+
+    history = MetricHistory(('total_load_mw', 'ev_charging_mw'))
+    rng = np.random.default_rng(0)
+    times = np.arange(0, hours * 3600, 0.1)
+
+    start = time.perf_counter()
+    for t in times:
+        history.append(t, (2200 + 200 * np.sin(t / 3600) + rng.normal(0, 5), 10 + rng.normal(0, 1)))
+    elapsed = time.perf_counter() - start
+    print(f"{len(times)} samples in {elapsed:.2f} s ({elapsed / len(times) * 1e6:.1f} us per sample)")
+
+    for resolution in history.resolutions:
+        result = history.query(['total_load_mw'], resolution)
+        print(f"{resolution:>5}: {len(result['time'])} points from t={result['time'][0]:.1f} s")
+
+    hourly = history.query(['total_load_mw'], '1h')['metrics']['total_load_mw']
+    for t, low, mean, high in zip(history.query(resolution='1h')['time'], hourly['min'], hourly['mean'], hourly['max']):
+        print(f"  {t / 3600:.0f}h: min {low:.1f}  mean {mean:.1f}  max {high:.1f} MW")
+
+    # A restored history carries on in the open buckets instead of repeating them
+    restored = MetricHistory(history.fields)
+    restored.load_arrays(history.to_arrays())
+    for t in times[-1] + np.arange(1, 11) * 0.1:
+        sample = (2200.0, 10.0)
+        history.append(t, sample)
+        restored.append(t, sample)
+    matches = all(history.query(resolution=r) == restored.query(resolution=r) for r in history.resolutions)
+    print(f"Restored history matches after more samples: {matches}")
+    return history
+
+if __name__ == "__main__":
+    test_metric_history()
@@ -1,30 +1,29 @@
-import gzip
-import xml.etree.ElementTree as ET
+# Run from the repository root: python -m miami.check_tls_id_mismatches
+import os
+
+from sumo_net_reader import iter_tl_logics
+
+MIAMI_DIR = os.path.dirname(os.path.abspath(__file__))
 
 def get_tllogic_ids_from_net(netfile):
     ids = set()
-    with gzip.open(netfile, 'rt', encoding='utf-8') as f:
-        tree = ET.parse(f)
-        root = tree.getroot()
-        for tl in root.findall('tlLogic'):
-            tid = tl.get('id')
-            if tid is not None:
-                ids.add(tid)
+    for tl in iter_tl_logics(netfile):
+        tid = tl.get('id')
+        if tid is not None:
+            ids.add(tid)
     return ids
 
 def get_tllogic_ids_from_add(addfile):
     ids = set()
-    tree = ET.parse(addfile)
-    root = tree.getroot()
-    for tl in root.findall('tlLogic'):
+    for tl in iter_tl_logics(addfile):
         tid = tl.get('id')
         if tid is not None:
             ids.add(tid)
     return ids
 
 if __name__ == "__main__":
-    netfile = 'osm.net.xml.gz'
-    addfile = 'traffic_lights.add.xml'
+    netfile = os.path.join(MIAMI_DIR, 'osm.net.xml.gz')
+    addfile = os.path.join(MIAMI_DIR, 'traffic_lights.add.xml')
     print(f"Checking network file: {netfile}")
     print(f"Checking add file: {addfile}")
 
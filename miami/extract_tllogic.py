@@ -1,15 +1,16 @@
-import gzip
-import xml.etree.ElementTree as ET
+# Run from the repository root: python -m miami.extract_tllogic
+import os
+
+from sumo_net_reader import iter_tl_logics
+
+MIAMI_DIR = os.path.dirname(os.path.abspath(__file__))
 
 def extract_tllogics(filename):
-    with gzip.open(filename, 'rt', encoding='utf-8') as f:
-        tree = ET.parse(f)
-        root = tree.getroot()
-        for tl in root.findall('tlLogic'):
-            print(f"\n<tlLogic id=\"{tl.get('id')}\" type=\"{tl.get('type')}\" programID=\"{tl.get('programID')}\" offset=\"{tl.get('offset')}\">")
-            for phase in tl.findall('phase'):
-                print(f"    <phase duration=\"{phase.get('duration')}\" state=\"{phase.get('state')}\"/>")
-            print("</tlLogic>")
+    for tl in iter_tl_logics(filename):
+        print(f"\n<tlLogic id=\"{tl.get('id')}\" type=\"{tl.get('type')}\" programID=\"{tl.get('programID')}\" offset=\"{tl.get('offset')}\">")
+        for phase in tl['phases']:
+            print(f"    <phase duration=\"{phase.get('duration')}\" state=\"{phase.get('state')}\"/>")
+        print("</tlLogic>")
 
 if __name__ == "__main__":
-    extract_tllogics('osm.net.xml.gz')
\ No newline at end of file
+    extract_tllogics(os.path.join(MIAMI_DIR, 'osm.net.xml.gz'))
\ No newline at end of file
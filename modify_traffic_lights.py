@@ -3,52 +3,49 @@
 Script to modify existing traffic light logic to separate straight and left-turn signals
 """
 
-import gzip
 import xml.etree.ElementTree as ET
 import os
 import copy
 
+from sumo_net_reader import iter_net
+
 def analyze_traffic_light_structure(netfile):
     """Analyze current traffic light structure"""
     traffic_lights = {}
     connections = {}
     
-    with gzip.open(netfile, 'rt', encoding='utf-8') as f:
-        tree = ET.parse(f)
-        root = tree.getroot()
-        
-        # Get all traffic lights
-        for tl in root.findall('tlLogic'):
-            tl_id = tl.get('id')
+    # tlLogic and connection records in one streaming pass
+    for tag, record in iter_net(netfile, ('tlLogic', 'connection')):
+        if tag == 'tlLogic':
+            tl_id = record.get('id')
             phases = []
-            for phase in tl.findall('phase'):
+            for phase in record['phases']:
                 phases.append({
                     'duration': int(phase.get('duration')),
                     'state': phase.get('state')
                 })
             
             traffic_lights[tl_id] = {
-                'type': tl.get('type', 'static'),
-                'programID': tl.get('programID', '0'),
-                'offset': tl.get('offset', '0'),
+                'type': record.get('type', 'static'),
+                'programID': record.get('programID', '0'),
+                'offset': record.get('offset', '0'),
                 'phases': phases
             }
+            continue
         
-        # Get all connections
-        for conn in root.findall('connection'):
-            tl_id = conn.get('tl')
-            if tl_id:
-                if tl_id not in connections:
-                    connections[tl_id] = []
-                
-                connections[tl_id].append({
-                    'from': conn.get('from'),
-                    'to': conn.get('to'),
-                    'fromLane': conn.get('fromLane'),
-                    'toLane': conn.get('toLane'),
-                    'dir': conn.get('dir', 's'),  # Default to straight
-                    'linkIndex': conn.get('linkIndex')
-                })
+        tl_id = record.get('tl')
+        if tl_id:
+            if tl_id not in connections:
+                connections[tl_id] = []
+            
+            connections[tl_id].append({
+                'from': record.get('from'),
+                'to': record.get('to'),
+                'fromLane': record.get('fromLane'),
+                'toLane': record.get('toLane'),
+                'dir': record.get('dir', 's'),  # Default to straight
+                'linkIndex': record.get('linkIndex')
+            })
     
     return traffic_lights, connections
 
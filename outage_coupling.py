@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Outage-to-Traffic Coupling
+Precomputes which traffic lights hang off which power bus, finds the lights
+de-energized by an area blackout or by line outages, and switches them to
+the SUMO 'off' program (and back) in rate-limited batches so thousands of
+lights never stall a simulation step
+"""
+
+from collections import deque
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from bus_index import NearestBusIndex
+
+OFF_PROGRAM = 'off'  # SUMO's built-in program for a dark signal (priority rules apply)
+MAX_SWITCHES_PER_STEP = 500
+
+
+def _unsupplied(network, in_service):
+    """Mask of buses in islands without any generation, for a line in-service mask"""
+    n_bus = len(network.buses)
+    from_idx = network.lines.lookup('from', network.buses.index)[in_service]
+    to_idx = network.lines.lookup('to', network.buses.index)[in_service]
+
+    graph = sparse.csr_matrix((np.ones(len(from_idx)), (from_idx, to_idx)), shape=(n_bus, n_bus))
+    n_islands, labels = connected_components(graph, directed=False)
+    has_generation = np.bincount(network.generator_bus_index, network.generators.column('capacity_mw'),
+                                 minlength=n_bus) > 0
+    supplied = np.zeros(n_islands, dtype=bool)
+    supplied[np.unique(labels[has_generation])] = True
+    return ~supplied[labels]
+
+
+def lost_buses(network, outaged_lines):
+    """Buses that newly lose all generation when these lines (names) go out of service"""
+    in_service = network.dc_power_flow.in_service()
+    after = in_service.copy()
+    for name in outaged_lines:
+        after[network.lines.index[name]] = False
+    # Buses that were already unsupplied (isolated before the outage) are not lost to it
+    return np.flatnonzero(_unsupplied(network, after) & ~_unsupplied(network, in_service))
+
+
+class TrafficLightFeederIndex:
+    def __init__(self, network, light_ids, lat, lon, bus_index=None):
+        """
+        Assign every traffic light to its supplying bus.
+
+        Args:
+            network: Power network the lights are fed from.
+            light_ids (list): SUMO traffic light IDs.
+            lat, lon (array): Light coordinates.
+            bus_index (NearestBusIndex): Shared index, built here when not given.
+        """
+        self.network = network
+        self._source_ids = light_ids  # Caller's object, for the cheap identity check in matches()
+        self.light_ids = np.asarray(light_ids, dtype=object)
+        self.light_bus = (bus_index or NearestBusIndex(network)).assign(lat, lon)
+
+        # Lights grouped by bus (CSR layout): lights of bus b are order[offsets[b]:offsets[b + 1]]
+        n_bus = len(network.buses)
+        self._order = np.argsort(self.light_bus, kind='stable')
+        self._offsets = np.searchsorted(self.light_bus[self._order], np.arange(n_bus + 1))
+        self.lights_per_bus = np.diff(self._offsets)
+
+    def __len__(self):
+        return len(self.light_ids)
+
+    def matches(self, light_ids):
+        """Whether the index was built for this list of lights"""
+        if light_ids is self._source_ids:
+            return True
+        return len(light_ids) == len(self.light_ids) and all(a == b for a, b in zip(light_ids, self.light_ids))
+
+    def lights_on_buses(self, buses):
+        """Traffic light IDs supplied by any of the buses"""
+        buses = np.asarray(buses, dtype=np.intp)
+        if buses.size == 0:
+            return self.light_ids[:0]
+        slices = [self._order[self._offsets[b]:self._offsets[b + 1]] for b in buses.tolist()]
+        return self.light_ids[np.concatenate(slices)]
+
+    def lights_for_lines(self, outaged_lines):
+        """Traffic light IDs that go dark when these lines are out of service"""
+        return self.lights_on_buses(lost_buses(self.network, outaged_lines))
+
+
+class TrafficLightOutageController:
+    def __init__(self, trafficlight, max_per_step=MAX_SWITCHES_PER_STEP, off_program=OFF_PROGRAM):
+        """
+        Batch switching of SUMO traffic lights.
+
+        Args:
+            trafficlight: The traci.trafficlight domain (getProgram/setProgram).
+            max_per_step (int): Lights switched per simulation step; the rest wait for the next step.
+        """
+        self.trafficlight = trafficlight
+        self.max_per_step = max_per_step
+        self.off_program = off_program
+        self.saved_programs = {}  # Light -> program it ran before the outage
+        self._queue = deque()  # (light_id, switch_off)
+        self._queued = {}  # Light -> latest queued action, so repeated requests collapse
+        self.errors = 0
+
+    def switch_off(self, light_ids):
+        """Queue lights to go dark"""
+        for light_id in light_ids:
+            self._enqueue(light_id, True)
+
+    def restore(self, light_ids=None):
+        """Queue lights (default: all dark ones) to return to their previous program"""
+        for light_id in list(self.saved_programs) if light_ids is None else light_ids:
+            self._enqueue(light_id, False)
+
+    def _enqueue(self, light_id, switch_off):
+        if self._queued.get(light_id) == switch_off:
+            return
+        self._queued[light_id] = switch_off
+        self._queue.append((light_id, switch_off))
+
+    def step(self):
+        """Apply up to max_per_step queued switches; call once per simulation step"""
+        switched = 0
+        while self._queue and switched < self.max_per_step:
+            light_id, switch_off = self._queue.popleft()
+            if self._queued.get(light_id) != switch_off:
+                continue  # Superseded by a later request
+            del self._queued[light_id]
+            try:
+                if switch_off and light_id not in self.saved_programs:
+                    self.saved_programs[light_id] = self.trafficlight.getProgram(light_id)
+                    self.trafficlight.setProgram(light_id, self.off_program)
+                elif not switch_off and light_id in self.saved_programs:
+                    self.trafficlight.setProgram(light_id, self.saved_programs.pop(light_id))
+                else:
+                    continue
+            except Exception:
+                self.errors += 1
+                continue
+            switched += 1
+        return switched
+
+    @property
+    def pending(self):
+        return len(self._queued)
+
+    @property
+    def lights_off(self):
+        return len(self.saved_programs)
+
+
+def test_outage_coupling(n_lights=5000):
+    """Black out Manhattan and switch its lights off and back on in batches"""
+    print("=" * 60)
+    print("Testing Outage-to-Traffic Coupling")
+    print("=" * 60)
+
+    from pypsa_network_builder import NYCPowerNetworkSimple
+
+    class FakeTrafficLights:
+        def __init__(self):
+            self.programs = {}
+
+        def getProgram(self, light_id):
+            return self.programs.get(light_id, '0')
+
+        def setProgram(self, light_id, program):
+            self.programs[light_id] = program
+
+    network = NYCPowerNetworkSimple()
+    network.build_network()
+
+    rng = np.random.default_rng(0)
+    ids = [f'tl_{i}' for i in range(n_lights)]
+    index = TrafficLightFeederIndex(network, ids, rng.uniform(40.6, 40.85, n_lights),
+                                    rng.uniform(-74.0, -73.8, n_lights))
+    print(f"Lights per bus: {dict(zip(network.buses.names, index.lights_per_bus.tolist()))}")
+
+    lost = lost_buses(network, ['DL_Manhattan_Traffic'])
+    affected = index.lights_on_buses(lost)
+    print(f"Outage of DL_Manhattan_Traffic: buses {[network.buses.names[b] for b in lost]}, "
+          f"{len(affected)} lights")
+
+    lights = FakeTrafficLights()
+    controller = TrafficLightOutageController(lights)
+    controller.switch_off(affected)
+    steps = 0
+    while controller.pending:
+        controller.step()
+        steps += 1
+    print(f"Switched off {controller.lights_off} lights over {steps} steps")
+
+    controller.restore()
+    while controller.pending:
+        controller.step()
+    print(f"Restored, {controller.lights_off} lights still off")
+    return index
+
+if __name__ == "__main__":
+    test_outage_coupling()
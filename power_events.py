@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Power Event Engine
+Evaluates event thresholds for all lines and buses as array operations,
+with hysteresis (separate raise and clear levels) and minimum durations,
+and emits only state transitions (raised/cleared) as a compact stream
+"""
+
+from collections import deque, namedtuple
+import numpy as np
+
+# element: measurement the rule applies to; above: raise on high values (else low)
+EventRule = namedtuple('EventRule', 'name element above raise_at clear_at min_duration_s severity message')
+
+DEFAULT_RULES = (
+    EventRule('line_overload', 'line', True, 90.0, 85.0, 5.0, 'warning', "Line {element} at {value:.1f}% capacity"),
+    EventRule('line_trip', 'line', True, 100.0, 95.0, 0.0, 'critical',
+              "Line {element} tripped! Traffic lights may fail."),
+    EventRule('undervoltage', 'bus', False, 0.95, 0.96, 5.0, 'warning', "Bus {element} voltage at {value:.3f} pu"),
+    EventRule('undervoltage_critical', 'bus', False, 0.9, 0.92, 0.0, 'critical',
+              "Bus {element} voltage at {value:.3f} pu"),
+    EventRule('overvoltage', 'bus', True, 1.05, 1.04, 5.0, 'warning', "Bus {element} voltage at {value:.3f} pu"),
+    EventRule('overvoltage_critical', 'bus', True, 1.1, 1.08, 0.0, 'critical', "Bus {element} voltage at {value:.3f} pu"),
+    # Load minus generation; the band keeps solver round-off around zero from toggling it
+    EventRule('generation_shortage', 'system', True, 1.0, 0.1, 0.0, 'critical', "Generation shortage: {value:.1f} MW")
+)
+EVENT_LOG_SIZE = 500  # Transitions kept for late subscribers
+
+
+class _RuleState:
+    def __init__(self, names):
+        n = len(names)
+        self.names = names
+        self.active = np.zeros(n, dtype=bool)
+        self.since = np.full(n, np.nan)  # When the pending raise/clear condition started
+        self.raised_at = np.full(n, np.nan)
+
+
+class PowerEventEngine:
+    def __init__(self, rules=DEFAULT_RULES, log_size=EVENT_LOG_SIZE):
+        """Initialize with no active events"""
+        self.rules = tuple(rules)
+        self.states = {}
+        self.log = deque(maxlen=log_size)
+
+    def update(self, time_s, measurements):
+        """
+        Evaluate every rule and return the transitions at this time.
+
+        Args:
+            time_s (float): Simulation time.
+            measurements (dict): {element kind: (names, values array)}, e.g.
+                {'line': (line_names, utilization_percent), 'bus': (bus_names, voltage_pu)}.
+        """
+        transitions = []
+        for rule in self.rules:
+            if rule.element not in measurements:
+                continue
+            names, values = measurements[rule.element]
+            values = np.asarray(values, dtype=np.float64)
+
+            state = self.states.get(rule.name)
+            if state is None or len(state.active) != len(values):
+                state = self.states[rule.name] = _RuleState(names)  # New or resized topology
+
+            if rule.above:
+                raise_condition = values > rule.raise_at
+                clear_condition = values <= rule.clear_at
+            else:
+                raise_condition = values < rule.raise_at
+                clear_condition = values >= rule.clear_at
+
+            # Pending change: raise for inactive elements, clear for active ones
+            pending = np.where(state.active, clear_condition, raise_condition)
+            state.since = np.where(pending, np.where(np.isnan(state.since), time_s, state.since), np.nan)
+            fire = pending & (time_s - state.since >= rule.min_duration_s)
+            if not fire.any():
+                continue
+
+            raised = fire & ~state.active
+            state.active ^= fire
+            state.since[fire] = np.nan
+            state.raised_at[raised] = time_s
+
+            for i in np.flatnonzero(fire).tolist():
+                transitions.append(self._event(rule, names[i], float(values[i]), time_s,
+                                               'raised' if raised[i] else 'cleared', state.raised_at[i]))
+
+        self.log.extend(transitions)
+        return transitions
+
+    @staticmethod
+    def _event(rule, element, value, time_s, transition, raised_at):
+        event = {
+            'type': rule.name,
+            'state': transition,
+            'severity': rule.severity if transition == 'raised' else 'info',
+            'element': element,
+            'value': round(value, 4),
+            'time_s': time_s,
+            'message': rule.message.format(element=element, value=value)
+        }
+        if transition == 'cleared':
+            event['message'] = f"{rule.name.replace('_', ' ').capitalize()} cleared on {element}"
+            event['duration_s'] = time_s - float(raised_at)
+        return event
+
+    def active(self):
+        """Currently active events as (type, element) pairs"""
+        return [(name, state.names[i]) for name, state in self.states.items()
+                for i in np.flatnonzero(state.active).tolist()]
+
+    def active_count(self):
+        return int(sum(state.active.sum() for state in self.states.values()))
+
+    def events_since(self, time_s):
+        """Logged transitions at or after a simulation time"""
+        return [event for event in self.log if event['time_s'] >= time_s]
+
+    def reset(self):
+        self.states.clear()
+        self.log.clear()
+
+
+def test_event_engine():
+    """Line loading hovering around 90% raises one warning, not one per step"""
+    print("=" * 60)
+    print("Testing Power Event Engine")
+    print("=" * 60)
+
+    engine = PowerEventEngine()
+    rng = np.random.default_rng(0)
+    names = [f'Line_{i}' for i in range(1000)]
+    base = np.full(1000, 50.0)
+    base[:3] = 90.0  # Three lines hovering at the warning threshold
+
+    total = 0
+    for step in range(600):
+        utilization = base + rng.normal(0, 1.5, 1000)
+        if 300 <= step < 310:
+            utilization[3] = 104.0  # Short trip
+        events = engine.update(step * 1.0, {'line': (names, utilization)})
+        total += len(events)
+        for event in events:
+            if event['element'] in ('Line_0', 'Line_3') and step < 320:
+                print(f"t={event['time_s']:5.0f}s {event['state']:>7} {event['type']}: {event['message']}")
+
+    print(f"\n{total} transitions over 600 steps x 1000 lines, {engine.active_count()} active now")
+
+    # A balanced system leaves a residual of a few kW either side of zero
+    shortage = PowerEventEngine()
+    residual = rng.normal(0, 0.01, 600)
+    residual[200:210] = 25.0  # Real shortfall
+    flips = sum(len(shortage.update(step * 1.0, {'system': (['system'], [residual[step]])}))
+                for step in range(600))
+    print(f"Generation shortage transitions with a residual around zero: {flips} (one raise, one clear)")
+    return engine
+
+if __name__ == "__main__":
+    test_event_engine()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Power Flow Result Cache
+LRU cache of dispatch and power-flow results keyed on quantized load and
+generation vectors, so repeated or near-identical network states skip the
+solve completely
+"""
+
+from collections import OrderedDict
+import numpy as np
+
+DEFAULT_TOLERANCE_MW = 0.01  # States closer than this per component share a result
+DEFAULT_MAX_ENTRIES = 512
+
+
+class PowerFlowCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, tolerance_mw=DEFAULT_TOLERANCE_MW):
+        """Initialize an empty cache"""
+        self.max_entries = max_entries
+        self.tolerance_mw = tolerance_mw
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, vectors, context=()):
+        """
+        Cache key for a network state.
+
+        Args:
+            vectors (list): MW arrays (e.g. bus loads, available generation), quantized to tolerance_mw.
+            context (tuple): Hashable solver settings the result depends on (topology version, modes).
+        """
+        quantized = [np.round(np.asarray(v, dtype=np.float64) / self.tolerance_mw).astype(np.int64).tobytes()
+                     for v in vectors]
+        return (tuple(context), *quantized)
+
+    def get(self, key):
+        """Cached result for a key, or None on a miss"""
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        """Store a result, evicting the least recently used entry when full"""
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (metrics are kept)"""
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_statistics(self):
+        """Hit/miss metrics"""
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hit_rate * 100, 1)
+        }
+
+
+def test_power_flow_cache():
+    """Near-identical states hit, new states and topology changes miss, the oldest entry is evicted"""
+    print("=" * 60)
+    print("Testing Power Flow Result Cache")
+    print("=" * 60)
+
+    cache = PowerFlowCache(max_entries=2)
+    load = np.array([800.0, 1200.0, 600.0])
+
+    first = cache.key([load], context=(0, 'merit_order'))
+    cache.put(first, 'result at 0')
+    print(f"Within tolerance: {cache.get(cache.key([load + 0.001], context=(0, 'merit_order')))}")
+    print(f"Topology changed: {cache.get(cache.key([load], context=(1, 'merit_order')))}")
+
+    cache.put(cache.key([load + 10], context=(0, 'merit_order')), 'result at +10')
+    cache.put(cache.key([load + 20], context=(0, 'merit_order')), 'result at +20')
+    print(f"After two more states: first state {cache.get(first)}, {len(cache)} entries")
+    print(cache.get_statistics())
+    return cache
+
+if __name__ == "__main__":
+    test_power_flow_cache()
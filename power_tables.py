@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Array-backed Component Tables
+Stores power network components (buses, generators, loads, lines) as
+integer-indexed NumPy columns while still behaving like the original
+dict-of-dicts, so existing code and the frontend keep working
+"""
+
+from collections.abc import Mapping, MutableMapping
+import numbers
+import numpy as np
+
+
+class ComponentRow(MutableMapping):
+    """Dict-like view of one component; reads and writes go to the table columns"""
+
+    __slots__ = ('_table', '_i')
+
+    def __init__(self, table, i):
+        self._table = table
+        self._i = i
+
+    def __getitem__(self, field):
+        column = self._table.columns[field]
+        value = column[self._i]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def __setitem__(self, field, value):
+        self._table.set_value(self._i, field, value)
+
+    def __delitem__(self, field):
+        raise TypeError("Component fields cannot be deleted")
+
+    def __iter__(self):
+        return iter(self._table.columns)
+
+    def __len__(self):
+        return len(self._table.columns)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class ComponentTable(Mapping):
+    def __init__(self, records=None, structural_fields=()):
+        """
+        Build a table from a {name: {field: value}} mapping.
+
+        Fields whose values are all numeric become float64 columns, the rest
+        are kept as object columns. Writes to structural_fields (e.g. line
+        endpoints or impedances) bump the table version so cached matrices
+        know to rebuild.
+        """
+        self.names = []
+        self.index = {}
+        self.columns = {}
+        self.structural_fields = set(structural_fields)
+        self.version = 0
+
+        records = records or {}
+        self.names = list(records)
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        fields = []
+        for record in records.values():
+            for field in record:
+                if field not in fields:
+                    fields.append(field)
+
+        for field in fields:
+            values = [record.get(field) for record in records.values()]
+            if all(isinstance(v, numbers.Number) and not isinstance(v, bool) for v in values):
+                self.columns[field] = np.array(values, dtype=np.float64)
+            else:
+                self.columns[field] = np.array(values, dtype=object)
+
+    @classmethod
+    def from_columns(cls, names, columns, structural_fields=()):
+        """Build a table directly from column arrays (e.g. read from CSV) without per-row dicts"""
+        table = cls(structural_fields=structural_fields)
+        table.names = list(names)
+        table.index = {name: i for i, name in enumerate(table.names)}
+        for field, values in columns.items():
+            values = np.asarray(values)
+            if values.dtype.kind in 'iuf':
+                table.columns[field] = values.astype(np.float64)
+            elif values.dtype.kind == 'b':
+                table.columns[field] = values.copy()
+            else:
+                table.columns[field] = values.astype(object)
+        return table
+
+    # Mapping interface (dict-of-dicts view)
+    def __getitem__(self, name):
+        return ComponentRow(self, self.index[name])
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def column(self, field):
+        """Live NumPy column for a field (writes are visible through the rows)"""
+        if field not in self.columns:
+            self.columns[field] = np.zeros(len(self.names))
+        return self.columns[field]
+
+    def set_value(self, i, field, value):
+        """Write a single value, adding the column if the field is new"""
+        if field not in self.columns:
+            self.columns[field] = np.full(len(self.names), None, dtype=object)
+        column = self.columns[field]
+        if column.dtype != object and not isinstance(value, numbers.Number):
+            column = self.columns[field] = column.astype(object)
+        column[i] = value
+        if field in self.structural_fields:
+            self.version += 1
+
+    def add(self, name, record):
+        """Append a component; intended for topology changes, not per-frame updates"""
+        self.index[name] = len(self.names)
+        self.names.append(name)
+        for field in set(self.columns) | set(record):
+            if field not in self.columns:
+                self.columns[field] = np.full(len(self.names) - 1, None, dtype=object)
+            column = self.columns[field]
+            value = record.get(field, np.nan if column.dtype != object else None)
+            if column.dtype != object and not isinstance(value, numbers.Number):
+                column = column.astype(object)
+            self.columns[field] = np.append(column, np.array([value], dtype=column.dtype))
+        self.version += 1
+
+    def lookup(self, field, index):
+        """Map a column of component names (e.g. 'bus') to integer indexes of another table"""
+        return np.array([index[value] for value in self.columns[field]], dtype=np.intp)
+
+    def to_records(self):
+        """Plain dict-of-dicts copy (for JSON output)"""
+        return {name: dict(self[name]) for name in self.names}
+
+
+def test_component_table():
+    """The table reads and writes like the dict-of-dicts it replaced"""
+    print("=" * 60)
+    print("Testing Array-Backed Component Tables")
+    print("=" * 60)
+
+    import json
+
+    records = {
+        'TL_A': {'from': 'Bus_1', 'to': 'Bus_2', 'capacity_mw': 500, 'current_flow': 0},
+        'TL_B': {'from': 'Bus_2', 'to': 'Bus_3', 'capacity_mw': 450, 'current_flow': 0}
+    }
+    lines = ComponentTable(records, structural_fields=('from', 'to'))
+
+    # Rows behave like the original dicts and return plain Python values
+    print(f"Round trip: {lines.to_records() == records}")
+    print(f"Row view: {lines['TL_A']}, capacity type {type(lines['TL_A']['capacity_mw']).__name__}")
+    print(f"Dict API: {list(lines)} / {'TL_B' in lines} / {len(lines)} rows / {lines['TL_B'].get('missing', '-')}")
+
+    # Row writes land in the columns; only structural fields bump the version
+    lines['TL_A']['current_flow'] = 125.5
+    version = lines.version
+    lines['TL_B']['to'] = 'Bus_1'
+    print(f"Column after row write: {lines.column('current_flow').tolist()}, "
+          f"version bumped by structural write: {lines.version > version}")
+
+    lines.add('TL_C', {'from': 'Bus_3', 'to': 'Bus_1', 'capacity_mw': 300})
+    print(f"Lookup: {lines.lookup('from', {'Bus_1': 0, 'Bus_2': 1, 'Bus_3': 2}).tolist()}")
+
+    # The frontend receives get_status() as JSON
+    from pypsa_network_builder import NYCPowerNetworkSimple
+
+    network = NYCPowerNetworkSimple()
+    network.build_network()
+    network.simulate_power_flow()
+    status = network.get_status()
+    print(f"get_status is JSON-serializable: {bool(json.dumps(status))}, "
+          f"line utilization values are floats: "
+          f"{all(type(v) is float for v in status['line_utilization'].values())}")
+    return lines
+
+if __name__ == "__main__":
+    test_component_table()
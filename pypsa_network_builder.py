@@ -6,9 +6,31 @@ This version focuses on network structure without complex optimization
 
 import pandas as pd
 import numpy as np
+from scipy import sparse
 import json
 import os
+import warnings
 from datetime import datetime
+from power_tables import ComponentTable
+from dc_power_flow import DCPowerFlow
+from economic_dispatch import EconomicDispatch
+from ac_power_flow import ACPowerFlow
+from power_flow_cache import PowerFlowCache
+from simulation_clock import SimulationClock
+
+# Hourly profiles (index = hour of day)
+LOAD_FACTOR_BY_HOUR = np.array([0.6] * 6 + [0.8] * 3 + [0.9] * 8 + [1.0] * 4 + [0.7] * 3)
+STREET_LIGHT_BY_HOUR = np.array([1.0] * 6 + [0.0] * 13 + [1.0] * 5)  # On before 6:00 and after 18:00
+
+def solar_capacity_factor(hour_of_day):
+    """Solar availability for a (fractional) hour of day: half-sine between 6:00 and 18:00"""
+    hour_of_day = np.asarray(hour_of_day, dtype=np.float64)
+    return np.where((hour_of_day >= 6) & (hour_of_day <= 18), np.sin((hour_of_day - 6) * np.pi / 12), 0.0)
+
+SOLAR_BY_HOUR = solar_capacity_factor(np.arange(24))
+
+# Line fields that change the network topology / admittances
+LINE_STRUCTURAL_FIELDS = ('from', 'to', 'resistance', 'reactance', 'in_service')
 
 class NYCPowerNetworkSimple:
     def __init__(self):
@@ -24,7 +46,8 @@ class NYCPowerNetworkSimple:
         
         # Time series (24 hours)
         self.time_steps = pd.date_range('2025-01-01', periods=24, freq='h')
-        self.current_hour = 0
+        self.clock = None
+        self.attach_clock(SimulationClock())
         
         # Traffic-related loads
         self.traffic_light_loads = {}
@@ -35,7 +58,45 @@ class NYCPowerNetworkSimple:
         self.total_generation = 0
         self.total_load = 0
         self.line_flows = {}
+        self.load_shed_mw = 0
+        
+        # Dispatch: 'merit_order' (ignores line limits) or 'lp' (security-constrained)
+        self.dispatch_mode = 'merit_order'
+        self.economic_dispatch = None
         
+        # Power flow: 'dc' (PTDF) or 'ac' (Newton-Raphson with bus voltages)
+        self.power_flow_mode = 'dc'
+        self.ac_power_flow = None
+        self.power_flow_converged = True  # False when the last AC solve failed (voltages unknown)
+        
+        # Results of recent solves keyed on quantized loads (None disables caching)
+        self.power_flow_cache = PowerFlowCache()
+        
+    def attach_clock(self, clock):
+        """Use a (shared) simulation clock and register the network's daily profiles on it"""
+        clock.add_hourly_profile('load_factor', LOAD_FACTOR_BY_HOUR)
+        clock.add_hourly_profile('street_light', STREET_LIGHT_BY_HOUR)
+        clock.add_profile('solar', solar_capacity_factor)
+        self.clock = clock
+    
+    @property
+    def current_hour(self):
+        """Hour of day on the simulation clock"""
+        return self.clock.hour
+    
+    @current_hour.setter
+    def current_hour(self, hour):
+        self.clock.hour = hour
+    
+    @property
+    def simulation_time_s(self):
+        """Simulation time in seconds on the simulation clock"""
+        return self.clock.time_s
+    
+    @simulation_time_s.setter
+    def simulation_time_s(self, time_s):
+        self.clock.set_time(time_s)
+    
     def build_network(self):
         """Build the NYC power network"""
         print("Building Simplified NYC Power Network...")
@@ -45,10 +106,56 @@ class NYCPowerNetworkSimple:
         self._add_lines()
         self._add_base_loads()
         self._add_traffic_infrastructure()
+        self._build_tables()
         
         print("Network built successfully!")
         return self
     
+    def _build_tables(self):
+        """Convert the component dicts into array-backed tables with integer indexes"""
+        def as_table(components, structural_fields=()):
+            # Loaders may already provide tables built from columns
+            if isinstance(components, ComponentTable):
+                components.structural_fields = set(structural_fields)
+                return components
+            return ComponentTable(components, structural_fields=structural_fields)
+        
+        self.buses = as_table(self.buses)
+        self.generators = as_table(self.generators)
+        self.loads = as_table(self.loads)
+        self.lines = as_table(self.lines, LINE_STRUCTURAL_FIELDS)
+        if 'in_service' not in self.lines.columns:
+            self.lines.columns['in_service'] = np.ones(len(self.lines), dtype=bool)
+        self.traffic_light_loads = as_table(self.traffic_light_loads)
+        self.street_light_loads = as_table(self.street_light_loads)
+        self.ev_charging_loads = as_table(self.ev_charging_loads)
+        self._index_components()
+    
+    def _index_components(self):
+        """Resolve bus names to integer indexes and pre-compute dispatch order"""
+        bus_index = self.buses.index
+        self.load_tables = [self.loads, self.traffic_light_loads, self.street_light_loads, self.ev_charging_loads]
+        self.load_bus_indices = [table.lookup('bus', bus_index) for table in self.load_tables]
+        self.generator_bus_index = self.generators.lookup('bus', bus_index)
+        
+        # Merit order (cheapest first) and renewable availability
+        self.merit_order = np.argsort(self.generators.column('cost_per_mwh'), kind='stable')
+        self.solar_mask = self.generators.column('type') == 'solar'
+        
+        # Component-to-bus connection matrices (components x buses) for batch runs
+        n_bus = len(self.buses)
+        self.generator_connection = self._connection_matrix(self.generator_bus_index, n_bus)
+        self.load_connections = [self._connection_matrix(idx, n_bus) for idx in self.load_bus_indices]
+        self.bus_injection = np.zeros(len(self.buses))
+        
+        # Per-bus traffic loads from the coupler's nearest-bus assignment (see set_bus_loads)
+        self.bus_traffic_light_mw = np.zeros(n_bus)
+        self.bus_ev_charging_mw = np.zeros(n_bus)
+        self.bus_energized = np.ones(n_bus, dtype=bool)  # False for buses in an outage (no load served)
+        
+        # DC power flow (PTDF is cached until the line table changes)
+        self.dc_power_flow = DCPowerFlow(self)
+    
     def _add_buses(self):
         """Add electrical buses (substations)"""
         self.buses = {
@@ -106,22 +213,29 @@ class NYCPowerNetworkSimple:
     
     def _add_lines(self):
         """Add transmission lines"""
+        # Each transmission line stands for a corridor of several cable circuits, rated for
+        # the peak flow from the Queens/Brooklyn plants into Manhattan and the Bronx
         self.lines = {
             'TL_Manhattan_Brooklyn': {
                 'from': 'Manhattan_South', 'to': 'Brooklyn_Central',
-                'capacity_mw': 500, 'resistance': 0.01, 'current_flow': 0
+                'capacity_mw': 1200, 'resistance': 0.01, 'current_flow': 0
             },
             'TL_Manhattan_Queens': {
                 'from': 'Manhattan_Central', 'to': 'Queens_West',
-                'capacity_mw': 600, 'resistance': 0.01, 'current_flow': 0
+                'capacity_mw': 2400, 'resistance': 0.01, 'current_flow': 0
             },
             'TL_Manhattan_Bronx': {
                 'from': 'Manhattan_Central', 'to': 'Bronx_Central',
-                'capacity_mw': 400, 'resistance': 0.008, 'current_flow': 0
+                'capacity_mw': 600, 'resistance': 0.008, 'current_flow': 0
             },
             'TL_Brooklyn_Queens': {
                 'from': 'Brooklyn_Central', 'to': 'Queens_West',
-                'capacity_mw': 450, 'resistance': 0.012, 'current_flow': 0
+                'capacity_mw': 1500, 'resistance': 0.012, 'current_flow': 0
+            },
+            # Ties lower and midtown Manhattan, closing the Queens-Brooklyn-Manhattan loop
+            'TL_Manhattan_South_Central': {
+                'from': 'Manhattan_South', 'to': 'Manhattan_Central',
+                'capacity_mw': 1200, 'resistance': 0.006, 'current_flow': 0
             },
             # Distribution lines to traffic infrastructure
             'DL_Manhattan_Traffic': {
@@ -230,104 +344,280 @@ class NYCPowerNetworkSimple:
         green_ratio = sum(1 for state in traffic_light_states.values() if 'g' in state.lower()) / max(len(traffic_light_states), 1)
         power_factor = 1.0 + (1.0 - green_ratio) * 0.1  # Up to 10% more power when not green
         
-        for tl_load in self.traffic_light_loads.values():
-            tl_load['current_mw'] = tl_load['base_mw'] * power_factor
+        self.traffic_light_loads.column('current_mw')[:] = self.traffic_light_loads.column('base_mw') * power_factor
+
+    def set_ev_charging_demand(self, demand_mw):
+        """Set EV charging loads from a {load_name: MW} mapping, capped at station capacity"""
+        for name, mw in demand_mw.items():
+            if name in self.ev_charging_loads:
+                ev_load = self.ev_charging_loads[name]
+                ev_load['current_mw'] = min(mw, ev_load['capacity_mw'])
+
+    def set_bus_loads(self, traffic_light_mw=None, ev_charging_mw=None):
+        """Set per-bus traffic light and EV charging loads (arrays over buses, in MW)"""
+        if traffic_light_mw is not None:
+            self.bus_traffic_light_mw = np.asarray(traffic_light_mw, dtype=np.float64)
+        if ev_charging_mw is not None:
+            self.bus_ev_charging_mw = np.asarray(ev_charging_mw, dtype=np.float64)
+
+    def set_bus_outage(self, buses):
+        """De-energize buses (integer indexes); an empty list restores all"""
+        self.bus_energized = np.ones(len(self.buses), dtype=bool)
+        self.bus_energized[np.asarray(buses, dtype=np.intp)] = False
+
+    def nearest_ev_charging_load(self, lat, lon):
+        """Name of the EV charging load whose bus is closest to a location"""
+        names = list(self.ev_charging_loads.keys())
+        bus_lat = np.array([self.buses[self.ev_charging_loads[n]['bus']]['lat'] for n in names])
+        bus_lon = np.array([self.buses[self.ev_charging_loads[n]['bus']]['lon'] for n in names])
+        return names[int(np.argmin((bus_lat - lat) ** 2 + (bus_lon - lon) ** 2))]
     
     def simulate_power_flow(self):
-        """Simple power flow simulation"""
-        # Calculate total load
-        self.total_load = 0
+        """Simple power flow simulation (vectorized over all components)"""
+        clock = self.clock
         
-        # Base loads
-        for load in self.loads.values():
-            # Apply time-of-day factor
-            hour = self.current_hour
-            if 0 <= hour < 6:
-                factor = 0.6
-            elif 6 <= hour < 9:
-                factor = 0.8
-            elif 9 <= hour < 17:
-                factor = 0.9
-            elif 17 <= hour < 21:
-                factor = 1.0
-            else:
-                factor = 0.7
-            
-            load['current_mw'] = load['base_mw'] * factor
-            self.total_load += load['current_mw']
-        
-        # Traffic infrastructure loads
-        for tl_load in self.traffic_light_loads.values():
-            self.total_load += tl_load['current_mw']
-        
-        for sl_load in self.street_light_loads.values():
-            # Street lights on at night
-            hour = self.current_hour
-            if hour < 6 or hour > 18:
-                sl_load['current_mw'] = sl_load['base_mw']
-            else:
-                sl_load['current_mw'] = 0
-            self.total_load += sl_load['current_mw']
+        # Base loads with time-of-day factor, street lights on at night (profile table lookups)
+        self.loads.column('current_mw')[:] = self.loads.column('base_mw') * clock.value('load_factor')
+        self.street_light_loads.column('current_mw')[:] = \
+            self.street_light_loads.column('base_mw') * clock.value('street_light')
         
-        for ev_load in self.ev_charging_loads.values():
-            self.total_load += ev_load['current_mw']
+        bus_load = np.zeros(len(self.buses))
+        for table, bus_index in zip(self.load_tables, self.load_bus_indices):
+            bus_load += np.bincount(bus_index, table.column('current_mw'), minlength=len(self.buses))
+        bus_load += self.bus_traffic_light_mw + self.bus_ev_charging_mw
+        bus_load *= self.bus_energized
+        self.total_load = float(bus_load.sum())
         
-        # Dispatch generators (simple merit order)
-        self.total_generation = 0
-        remaining_load = self.total_load
-        
-        # Solar first (if daytime)
-        hour = self.current_hour
-        if 6 <= hour <= 18:
-            solar_output = self.generators['Solar_Brooklyn']['capacity_mw'] * np.sin((hour - 6) * np.pi / 12)
-            self.generators['Solar_Brooklyn']['current_output'] = min(solar_output, remaining_load)
-            self.total_generation += self.generators['Solar_Brooklyn']['current_output']
-            remaining_load -= self.generators['Solar_Brooklyn']['current_output']
-        
-        # Then dispatch gas plants by cost
-        for gen_name in ['Ravenswood_PowerPlant', 'Astoria_PowerPlant', 'Hudson_Avenue_Plant']:
-            if remaining_load > 0:
-                gen = self.generators[gen_name]
-                gen['current_output'] = min(gen['capacity_mw'], remaining_load)
-                self.total_generation += gen['current_output']
-                remaining_load -= gen['current_output']
+        # Dispatch generators (solar limited by irradiance)
+        available = self.generators.column('capacity_mw').copy()
+        available[self.solar_mask] *= clock.value('solar')
+        
+        # Near-identical states reuse a cached solve
+        cache = self.power_flow_cache
+        if cache is not None:
+            key = cache.key((bus_load, available, self.lines.column('capacity_mw')),
+                            (self.dc_power_flow.topology_version, self.dispatch_mode, self.power_flow_mode))
+            result = cache.get(key)
+            if result is None:
+                result = self._solve_power_flow(bus_load, available)
+                cache.put(key, result)
+        else:
+            result = self._solve_power_flow(bus_load, available)
+        
+        self.generators.column('current_output')[:] = result['generation']
+        self.total_generation = float(result['generation'].sum())
+        self.load_shed_mw = float(result['load_shed'].sum())
+        self.bus_injection = result['bus_injection'].copy()
+        self.lines.column('current_flow')[:] = result['line_flows']
+        self.power_flow_converged = result['converged']
+        if result.get('voltage') is not None:
+            self.buses.column('voltage_pu')[:] = np.abs(result['voltage'])
+            self.buses.column('angle_deg')[:] = np.degrees(np.angle(result['voltage']))
+        elif not self.power_flow_converged:
+            # No AC solution: the previous voltages are not current any more
+            self.buses.column('voltage_pu')[:] = np.nan
+            self.buses.column('angle_deg')[:] = np.nan
+            warnings.warn(f"AC power flow did not converge at {self.clock.timestamp():%Y-%m-%d %H:%M}; "
+                          f"line flows from the DC solution, bus voltages unknown")
+    
+    def _solve_power_flow(self, bus_load, available):
+        """Dispatch and power flow for one state; returns arrays only so results can be cached"""
+        if self.dispatch_mode == 'lp':
+            output, shed = self.economic_dispatch.dispatch(available, bus_load)
+            bus_load = bus_load - shed
+        else:
+            output = self._merit_order_dispatch(available, bus_load.sum())
+            shed = np.zeros(len(self.buses))
+        
+        # Net injection per bus
+        injection = np.bincount(self.generator_bus_index, output, minlength=len(self.buses)) - bus_load
+        
+        # DC line flows from the cached PTDF or sparse factorization
+        flows = self.dc_power_flow.line_flows(injection)
+        voltage = None
+        converged = True
+        if self.power_flow_mode == 'ac':
+            voltage = self.ac_power_flow.solve(injection, bus_load)
+            converged = self.ac_power_flow.converged
+            if converged:
+                flows = self.ac_power_flow.line_flows(voltage)
             else:
-                self.generators[gen_name]['current_output'] = 0
+                voltage = None
         
-        # Simple line flow calculation
-        for line_name, line in self.lines.items():
-            # Simplified: flow proportional to load difference
-            line['current_flow'] = min(self.total_load * 0.1, line['capacity_mw'])
+        return {
+            'generation': np.array(output, dtype=np.float64),
+            'load_shed': np.asarray(shed, dtype=np.float64),
+            'bus_injection': injection,
+            'line_flows': flows,
+            'voltage': voltage,
+            'converged': converged
+        }
+    
+    @staticmethod
+    def _connection_matrix(bus_index, n_bus):
+        """Sparse 0/1 matrix mapping components to their buses"""
+        n = len(bus_index)
+        return sparse.csr_matrix((np.ones(n), (np.arange(n), bus_index)), shape=(n, n_bus))
+    
+    def daily_profiles(self, hours=24, resolution_minutes=60):
+        """
+        Build profile matrices from the hourly time-of-day tables for simulate_time_series.
+        
+        Traffic lights and EV charging are held at their current values,
+        street lights follow the night schedule.
+        """
+        steps = int(hours * 60 // resolution_minutes)
+        seconds_of_day = np.arange(steps) * resolution_minutes * 60.0
+        hour_of_day = (seconds_of_day // 3600).astype(int) % 24
+        clock = self.clock
+        
+        street_lights = np.outer(clock.values_at(seconds_of_day, 'street_light'),
+                                 self.street_light_loads.column('base_mw'))
+        traffic_bus_load = (
+            street_lights @ self.load_connections[2]
+            + self.traffic_light_loads.column('current_mw') @ self.load_connections[1]
+            + self.ev_charging_loads.column('current_mw') @ self.load_connections[3]
+            + self.bus_traffic_light_mw + self.bus_ev_charging_mw
+        )
+        
+        return {
+            'hour_of_day': hour_of_day,
+            'load_mw': np.outer(clock.values_at(seconds_of_day, 'load_factor'), self.loads.column('base_mw')),
+            'renewable_cf': np.tile(clock.values_at(seconds_of_day, 'solar')[:, None], (1, int(self.solar_mask.sum()))),
+            'traffic_bus_load_mw': traffic_bus_load,
+            'street_light_load_mw': street_lights.sum(axis=1)
+        }
+    
+    def simulate_time_series(self, load_mw, renewable_cf, traffic_bus_load_mw=None):
+        """
+        Simulate T steps in one vectorized call.
+        
+        Args:
+            load_mw (array): T x len(loads) base-load demand in MW.
+            renewable_cf (array): T x n_renewable capacity factors for the solar generators.
+            traffic_bus_load_mw (array): Optional T x len(buses) traffic infrastructure load.
+        
+        Returns a dict of arrays: generation (T x G), line flows and utilization
+        (T x L), and total load, generation and balance (T).
+        """
+        load_mw = np.atleast_2d(np.asarray(load_mw, dtype=np.float64))
+        steps = load_mw.shape[0]
+        
+        bus_load = load_mw @ self.load_connections[0]
+        if traffic_bus_load_mw is not None:
+            bus_load = bus_load + traffic_bus_load_mw
+        total_load = bus_load.sum(axis=1)
+        
+        available = np.tile(self.generators.column('capacity_mw'), (steps, 1))
+        available[:, self.solar_mask] *= np.asarray(renewable_cf, dtype=np.float64).reshape(steps, -1)
+        
+        if self.dispatch_mode == 'lp':
+            # Warm-started re-solves, one per step
+            generation = np.empty_like(available)
+            for t in range(steps):
+                generation[t], shed = self.economic_dispatch.dispatch(available[t], bus_load[t])
+                bus_load[t] -= shed
+        else:
+            stacked = available[:, self.merit_order]
+            before = np.cumsum(stacked, axis=1) - stacked
+            generation = np.empty_like(available)
+            generation[:, self.merit_order] = np.clip(total_load[:, None] - before, 0.0, stacked)
+        
+        injection = generation @ self.generator_connection - bus_load
+        flows = self.dc_power_flow.line_flows(injection.T).T
+        
+        capacity = self.lines.column('capacity_mw')
+        utilization = np.divide(np.abs(flows), capacity, out=np.zeros_like(flows), where=capacity > 0) * 100
+        total_generation = generation.sum(axis=1)
+        
+        return {
+            'generator_names': list(self.generators.names),
+            'line_names': list(self.lines.names),
+            'generation_mw': generation,
+            'line_flows_mw': flows,
+            'line_utilization': utilization,
+            'total_load_mw': total_load,
+            'total_generation_mw': total_generation,
+            'balance_mw': total_generation - total_load
+        }
+    
+    def set_dispatch_mode(self, mode):
+        """Select 'merit_order' or 'lp' (cost-optimal dispatch respecting line limits)"""
+        if mode not in ('merit_order', 'lp'):
+            raise ValueError(f"Unknown dispatch mode: {mode}")
+        self.dispatch_mode = mode
+        if mode == 'lp' and self.economic_dispatch is None:
+            self.economic_dispatch = EconomicDispatch(self)
+    
+    def set_power_flow_mode(self, mode):
+        """Select 'dc' (linear, angles only) or 'ac' (Newton-Raphson, bus voltage magnitudes)"""
+        if mode not in ('dc', 'ac'):
+            raise ValueError(f"Unknown power flow mode: {mode}")
+        self.power_flow_mode = mode
+        if mode == 'ac' and self.ac_power_flow is None:
+            self.ac_power_flow = ACPowerFlow(self)
+            self.buses.column('voltage_pu')[:] = 1.0
+    
+    def get_bus_voltages(self):
+        """Bus voltage magnitudes in per unit from the last AC solve"""
+        if 'voltage_pu' not in self.buses.columns:
+            return {}
+        return dict(zip(self.buses.names, self.buses.column('voltage_pu').tolist()))
+    
+    def _merit_order_dispatch(self, available, demand):
+        """Fill demand from the cheapest available generators first"""
+        stacked = available[self.merit_order]
+        before = np.cumsum(stacked) - stacked
+        output = np.empty_like(available)
+        output[self.merit_order] = np.clip(demand - before, 0.0, stacked)
+        return output
+    
+    def set_line_status(self, line_name, in_service):
+        """Switch a line in or out of service (invalidates the cached PTDF)"""
+        self.lines[line_name]['in_service'] = bool(in_service)
+    
+    def get_line_utilization(self):
+        """Line loading in percent of capacity as an array"""
+        capacity = self.lines.column('capacity_mw')
+        flow = self.lines.column('current_flow')
+        return np.divide(np.abs(flow), capacity, out=np.zeros_like(flow), where=capacity > 0) * 100
     
     def get_status(self):
         """Get current network status"""
         return {
-            'timestamp': self.time_steps[self.current_hour].strftime('%Y-%m-%d %H:%M'),
+            'timestamp': self.clock.timestamp().strftime('%Y-%m-%d %H:%M'),
             'total_generation_mw': round(self.total_generation, 2),
             'total_load_mw': round(self.total_load, 2),
             'balance_mw': round(self.total_generation - self.total_load, 2),
-            'traffic_light_load_mw': round(sum(tl['current_mw'] for tl in self.traffic_light_loads.values()), 2),
-            'street_light_load_mw': round(sum(sl['current_mw'] for sl in self.street_light_loads.values()), 2),
-            'ev_charging_load_mw': round(sum(ev['current_mw'] for ev in self.ev_charging_loads.values()), 2),
-            'generators': {name: round(gen['current_output'], 2) for name, gen in self.generators.items()},
-            'line_utilization': {name: round((line['current_flow'] / line['capacity_mw']) * 100, 1) 
-                               for name, line in self.lines.items()}
+            'load_shed_mw': round(self.load_shed_mw, 2),
+            'traffic_light_load_mw': round(float(self.traffic_light_loads.column('current_mw').sum()
+                                                 + self.bus_traffic_light_mw.sum()), 2),
+            'street_light_load_mw': round(float(self.street_light_loads.column('current_mw').sum()), 2),
+            'ev_charging_load_mw': round(float(self.ev_charging_loads.column('current_mw').sum()
+                                               + self.bus_ev_charging_mw.sum()), 2),
+            'generators': dict(zip(self.generators.names,
+                                   np.round(self.generators.column('current_output'), 2).tolist())),
+            'line_utilization': dict(zip(self.lines.names, np.round(self.get_line_utilization(), 1).tolist())),
+            'power_flow_converged': self.power_flow_converged,
+            # None marks voltages left unknown by a failed AC solve
+            'bus_voltages_pu': {bus: round(v, 4) if np.isfinite(v) else None
+                                for bus, v in self.get_bus_voltages().items()}
         }
     
     def advance_time(self):
         """Advance to next hour"""
-        self.current_hour = (self.current_hour + 1) % 24
+        self.clock.advance(3600)
     
     def save_state(self, filepath="nyc_power_state.json"):
         """Save current state to JSON"""
         state = {
-            'buses': self.buses,
-            'generators': self.generators,
-            'loads': self.loads,
-            'lines': self.lines,
-            'traffic_light_loads': self.traffic_light_loads,
-            'street_light_loads': self.street_light_loads,
-            'ev_charging_loads': self.ev_charging_loads,
+            'buses': self.buses.to_records(),
+            'generators': self.generators.to_records(),
+            'loads': self.loads.to_records(),
+            'lines': self.lines.to_records(),
+            'traffic_light_loads': self.traffic_light_loads.to_records(),
+            'street_light_loads': self.street_light_loads.to_records(),
+            'ev_charging_loads': self.ev_charging_loads.to_records(),
             'current_hour': self.current_hour,
             'total_generation': self.total_generation,
             'total_load': self.total_load
@@ -337,6 +627,17 @@ class NYCPowerNetworkSimple:
             json.dump(state, f, indent=2, default=str)
         
         print(f"State saved to {filepath}")
+    
+    def save_snapshot(self, filepath="nyc_power_state.npz", coupler=None):
+        """Save the full power model (and optionally the coupler history) as a binary NPZ snapshot"""
+        from state_snapshots import save_snapshot
+        save_snapshot(filepath, self, coupler)
+    
+    def load_snapshot(self, filepath="nyc_power_state.npz", coupler=None):
+        """Restore from an NPZ snapshot or a checkpoint directory written by CheckpointWriter"""
+        from state_snapshots import load_snapshot
+        load_snapshot(filepath, self, coupler)
+        return self
 
 def test_network():
     """Test the simplified network"""
@@ -363,17 +664,26 @@ def test_network():
     print("24-Hour Simulation:")
     print("-" * 60)
     
-    for hour in range(24):
-        network.current_hour = hour
-        network.simulate_power_flow()
-        status = network.get_status()
-        
-        if hour % 6 == 0:  # Print every 6 hours
-            print(f"\nTime: {status['timestamp']}")
-            print(f"Generation: {status['total_generation_mw']} MW")
-            print(f"Total Load: {status['total_load_mw']} MW")
-            print(f"Traffic Infrastructure: {status['traffic_light_load_mw'] + status['street_light_load_mw']} MW")
-            print(f"EV Charging: {status['ev_charging_load_mw']} MW")
+    # All 24 hours in one batch call
+    profiles = network.daily_profiles()
+    results = network.simulate_time_series(
+        profiles['load_mw'], profiles['renewable_cf'], profiles['traffic_bus_load_mw']
+    )
+    traffic_lights_mw = network.traffic_light_loads.column('current_mw').sum()
+    ev_charging_mw = network.ev_charging_loads.column('current_mw').sum()
+    
+    for hour in range(0, 24, 6):  # Print every 6 hours
+        print(f"\nTime: {network.time_steps[hour].strftime('%Y-%m-%d %H:%M')}")
+        print(f"Generation: {results['total_generation_mw'][hour]:.2f} MW")
+        print(f"Total Load: {results['total_load_mw'][hour]:.2f} MW")
+        print(f"Traffic Infrastructure: {traffic_lights_mw + profiles['street_light_load_mw'][hour]:.2f} MW")
+        print(f"EV Charging: {ev_charging_mw:.2f} MW")
+    
+    # A full year at hourly resolution
+    start = datetime.now()
+    yearly = network.daily_profiles(hours=8760)
+    network.simulate_time_series(yearly['load_mw'], yearly['renewable_cf'], yearly['traffic_bus_load_mw'])
+    print(f"\n8760-hour batch simulation: {(datetime.now() - start).total_seconds() * 1000:.1f} ms")
     
     # Test traffic integration
     print("\n" + "=" * 60)
@@ -3,84 +3,81 @@
 Script to randomize traffic light timing to break synchronization
 """
 
-import gzip
 import xml.etree.ElementTree as ET
 import os
 import random
 
+from sumo_net_reader import iter_tl_logics
+
 def randomize_traffic_lights(netfile):
     """Extract traffic lights and randomize their timing"""
     traffic_lights = {}
     
-    with gzip.open(netfile, 'rt', encoding='utf-8') as f:
-        tree = ET.parse(f)
-        root = tree.getroot()
-        
-        for tl in root.findall('tlLogic'):
-            tl_id = tl.get('id')
-            if tl_id is None:
-                continue
+    for tl in iter_tl_logics(netfile):
+        tl_id = tl.get('id')
+        if tl_id is None:
+            continue
+            
+        phases = []
+        for phase in tl['phases']:
+            duration = phase.get('duration')
+            state = phase.get('state')
+            if duration and state:
+                # Add slight randomization to phase duration (±2 seconds)
+                original_duration = int(duration)
+                randomized_duration = max(1, original_duration + random.randint(-2, 2))
                 
-            phases = []
-            for phase in tl.findall('phase'):
-                duration = phase.get('duration')
-                state = phase.get('state')
-                if duration and state:
-                    # Add slight randomization to phase duration (±2 seconds)
-                    original_duration = int(duration)
-                    randomized_duration = max(1, original_duration + random.randint(-2, 2))
+                phases.append({
+                    'duration': randomized_duration,
+                    'state': state
+                })
+        
+        if phases:
+            # Add random offset (0-60 seconds) to break synchronization
+            offset = random.randint(0, 60)
+            
+            # Better randomization of initial state
+            # Instead of random phase shift, we'll create a more realistic distribution
+            # 40% start with red, 30% start with yellow, 30% start with green
+            rand_val = random.random()
+            
+            if rand_val < 0.4:  # 40% start with red
+                # Find a red phase or create one
+                red_phases = [i for i, p in enumerate(phases) if 'r' in p['state'].lower() and 'g' not in p['state'].lower()]
+                if red_phases:
+                    phase_shift = random.choice(red_phases)
+                else:
+                    # If no red phase, start at a random phase
+                    phase_shift = random.randint(0, len(phases) - 1)
+                    
+            elif rand_val < 0.7:  # 30% start with yellow
+                # Find a yellow phase
+                yellow_phases = [i for i, p in enumerate(phases) if 'y' in p['state'].lower()]
+                if yellow_phases:
+                    phase_shift = random.choice(yellow_phases)
+                else:
+                    # If no yellow phase, start at a random phase
+                    phase_shift = random.randint(0, len(phases) - 1)
                     
-                    phases.append({
-                        'duration': randomized_duration,
-                        'state': state
-                    })
+            else:  # 30% start with green
+                # Find a green phase
+                green_phases = [i for i, p in enumerate(phases) if 'g' in p['state'].lower()]
+                if green_phases:
+                    phase_shift = random.choice(green_phases)
+                else:
+                    # If no green phase, start at a random phase
+                    phase_shift = random.randint(0, len(phases) - 1)
             
-            if phases:
-                # Add random offset (0-60 seconds) to break synchronization
-                offset = random.randint(0, 60)
-                
-                # Better randomization of initial state
-                # Instead of random phase shift, we'll create a more realistic distribution
-                # 40% start with red, 30% start with yellow, 30% start with green
-                rand_val = random.random()
-                
-                if rand_val < 0.4:  # 40% start with red
-                    # Find a red phase or create one
-                    red_phases = [i for i, p in enumerate(phases) if 'r' in p['state'].lower() and 'g' not in p['state'].lower()]
-                    if red_phases:
-                        phase_shift = random.choice(red_phases)
-                    else:
-                        # If no red phase, start at a random phase
-                        phase_shift = random.randint(0, len(phases) - 1)
-                        
-                elif rand_val < 0.7:  # 30% start with yellow
-                    # Find a yellow phase
-                    yellow_phases = [i for i, p in enumerate(phases) if 'y' in p['state'].lower()]
-                    if yellow_phases:
-                        phase_shift = random.choice(yellow_phases)
-                    else:
-                        # If no yellow phase, start at a random phase
-                        phase_shift = random.randint(0, len(phases) - 1)
-                        
-                else:  # 30% start with green
-                    # Find a green phase
-                    green_phases = [i for i, p in enumerate(phases) if 'g' in p['state'].lower()]
-                    if green_phases:
-                        phase_shift = random.choice(green_phases)
-                    else:
-                        # If no green phase, start at a random phase
-                        phase_shift = random.randint(0, len(phases) - 1)
-                
-                # Apply the phase shift
-                shifted_phases = phases[phase_shift:] + phases[:phase_shift]
-                
-                traffic_lights[tl_id] = {
-                    'type': tl.get('type', 'static'),
-                    'programID': tl.get('programID', '0'),
-                    'offset': offset,
-                    'phases': shifted_phases,
-                    'initial_state': shifted_phases[0]['state'] if shifted_phases else 'unknown'
-                }
+            # Apply the phase shift
+            shifted_phases = phases[phase_shift:] + phases[:phase_shift]
+            
+            traffic_lights[tl_id] = {
+                'type': tl.get('type', 'static'),
+                'programID': tl.get('programID', '0'),
+                'offset': offset,
+                'phases': shifted_phases,
+                'initial_state': shifted_phases[0]['state'] if shifted_phases else 'unknown'
+            }
     
     return traffic_lights
 
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Shared Simulation Clock
+Keeps the power model on the SUMO time axis and precomputes daily profile
+lookup tables (load, street lights, solar, ...) at any resolution, so each
+per-frame profile evaluation is a single array index
+"""
+
+from datetime import datetime, timedelta
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+DEFAULT_RESOLUTION_S = 60.0
+DEFAULT_START_DATE = datetime(2025, 1, 1)
+
+
+class SimulationClock:
+    def __init__(self, resolution_s=DEFAULT_RESOLUTION_S, start_offset_s=0.0, start_date=DEFAULT_START_DATE):
+        """
+        Initialize the clock.
+
+        Args:
+            resolution_s (float): Time step of the profile lookup tables.
+            start_offset_s (float): Time of day at simulation time 0 (e.g. 8 * 3600 to start at 08:00).
+            start_date (datetime): Calendar date of simulation time 0, for timestamps.
+        """
+        self.resolution_s = resolution_s
+        self.start_offset_s = start_offset_s
+        self.start_date = start_date
+        self.steps_per_day = int(round(SECONDS_PER_DAY / resolution_s))
+
+        self.time_s = 0.0  # Simulation time (SUMO seconds)
+        self.tables = {}
+
+        # Seconds since midnight at the start of each table slot
+        self._slot_seconds = np.arange(self.steps_per_day) * resolution_s
+
+    # Profiles
+    def add_hourly_profile(self, name, values_by_hour, interpolate=False):
+        """Register a 24-value hourly profile (step-wise, or linearly interpolated between hours)"""
+        values_by_hour = np.asarray(values_by_hour, dtype=np.float64)
+        hours = self._slot_seconds / 3600
+        if interpolate:
+            table = np.interp(hours, np.arange(25), np.append(values_by_hour, values_by_hour[0]))
+        else:
+            table = values_by_hour[hours.astype(int) % 24]
+        self.tables[name] = table
+        return table
+
+    def add_profile(self, name, function):
+        """Register a profile from a vectorized function of the (fractional) hour of day"""
+        self.tables[name] = np.asarray(function(self._slot_seconds / 3600), dtype=np.float64)
+        return self.tables[name]
+
+    def value(self, name):
+        """Profile value at the current time (one array lookup)"""
+        return self.tables[name][self.slot]
+
+    def values(self, name, times_s):
+        """Profile values at an array of simulation times"""
+        return self.tables[name][self.slots(times_s)]
+
+    def values_at(self, seconds_of_day, name):
+        """Profile values at times of day given in seconds since midnight"""
+        slots = (np.asarray(seconds_of_day, dtype=np.float64) % SECONDS_PER_DAY) // self.resolution_s
+        return self.tables[name][slots.astype(np.intp) % self.steps_per_day]
+
+    # Time axis
+    def set_time(self, time_s):
+        """Synchronize with the traffic simulation clock"""
+        self.time_s = float(time_s)
+
+    def advance(self, dt_s):
+        self.time_s += dt_s
+
+    def slots(self, times_s):
+        """Lookup-table indexes for an array of simulation times"""
+        seconds = (np.asarray(times_s, dtype=np.float64) + self.start_offset_s) % SECONDS_PER_DAY
+        return (seconds // self.resolution_s).astype(np.intp) % self.steps_per_day
+
+    @property
+    def slot(self):
+        seconds = (self.time_s + self.start_offset_s) % SECONDS_PER_DAY
+        return int(seconds // self.resolution_s) % self.steps_per_day
+
+    @property
+    def seconds_of_day(self):
+        return (self.time_s + self.start_offset_s) % SECONDS_PER_DAY
+
+    @property
+    def hour(self):
+        """Hour of day (0-23)"""
+        return int(self.seconds_of_day // 3600)
+
+    @hour.setter
+    def hour(self, hour):
+        """Jump to the start of an hour of the current simulated day"""
+        day_start = self.time_s + self.start_offset_s - self.seconds_of_day
+        self.time_s = day_start - self.start_offset_s + (int(hour) % 24) * 3600
+
+    def timestamp(self):
+        """Calendar time of the current simulation time"""
+        return self.start_date + timedelta(seconds=self.time_s + self.start_offset_s)
+
+
+def test_clock():
+    """Look up profiles at sub-hourly resolution"""
+    print("=" * 60)
+    print("Testing Simulation Clock")
+    print("=" * 60)
+
+    clock = SimulationClock(resolution_s=60, start_offset_s=6 * 3600)
+    clock.add_profile('solar', lambda h: np.where((h >= 6) & (h <= 18), np.sin((h - 6) * np.pi / 12), 0.0))
+    clock.add_hourly_profile('load', [0.6] * 6 + [0.8] * 3 + [0.9] * 8 + [1.0] * 4 + [0.7] * 3, interpolate=True)
+
+    for sumo_time in (0, 900, 1800, 3600, 4500):
+        clock.set_time(sumo_time)
+        print(f"SUMO t={sumo_time:5d}s  {clock.timestamp():%H:%M}  "
+              f"solar={clock.value('solar'):.3f}  load={clock.value('load'):.3f}")
+    return clock
+
+if __name__ == "__main__":
+    test_clock()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Binary State Snapshots
+Saves the power model (every component table column plus the solver state)
+and the coupler history to NPZ files. Incremental checkpoints only store
+the arrays that changed since the previous checkpoint, and restoring
+replays them on top of the last full snapshot
+"""
+
+import os
+import glob
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from power_tables import ComponentTable
+
+TABLES = ('buses', 'generators', 'loads', 'lines', 'traffic_light_loads', 'street_light_loads', 'ev_charging_loads')
+BUS_ARRAYS = ('bus_traffic_light_mw', 'bus_ev_charging_mw', 'bus_energized')
+NETWORK_SCALARS = ('simulation_time_s', 'total_generation', 'total_load', 'load_shed_mw', 'dispatch_mode', 'power_flow_mode',
+                   'power_flow_converged')
+COUPLER_FIELDS = ('vehicle_count', 'traffic_density_by_area', 'ev_energy_by_area', 'ev_station_mw',
+                  'last_contingency_time', 'contingency_results', 'power_events', 'lights_out', 'lines_out')
+FULL_SNAPSHOT_EVERY = 60  # Checkpoints between full snapshots
+KEEP_LAST_CHECKPOINTS = 120  # Checkpoints kept on disk (plus the full snapshot they need); None keeps all
+
+
+def _encode_json(value):
+    """Store arbitrary JSON-compatible state as a uint8 array (no pickling)"""
+    return np.frombuffer(json.dumps(value, default=str).encode('utf-8'), dtype=np.uint8)
+
+
+def _decode_json(array):
+    return json.loads(array.tobytes().decode('utf-8'))
+
+
+def snapshot_arrays(network, coupler=None):
+    """Flatten the network (and coupler) state into a {key: array} dict"""
+    arrays = {}
+    for name in TABLES:
+        table = getattr(network, name)
+        arrays[f'{name}/__names__'] = np.array(table.names, dtype=str)
+        for field, column in table.columns.items():
+            if column.dtype != object:
+                arrays[f'{name}/{field}'] = column
+            elif all(isinstance(v, str) for v in column):
+                arrays[f'{name}/{field}'] = column.astype(str)
+            else:
+                arrays[f'{name}/{field}.json'] = _encode_json(column.tolist())
+        arrays[f'{name}/__version__'] = np.array(table.version)
+
+    arrays['network/bus_injection'] = network.bus_injection
+    for name in BUS_ARRAYS:
+        arrays[f'network/{name}'] = getattr(network, name)
+    arrays['network/scalars.json'] = _encode_json({k: getattr(network, k) for k in NETWORK_SCALARS})
+
+    if coupler is not None:
+        arrays['coupler/state.json'] = _encode_json({k: getattr(coupler, k) for k in COUPLER_FIELDS})
+        for key, array in coupler.metrics_history.to_arrays().items():
+            arrays[f'coupler/history/{key}'] = array
+    return arrays
+
+
+def restore_arrays(arrays, network, coupler=None):
+    """Rebuild the network (and coupler) from a {key: array} dict"""
+    from pypsa_network_builder import LINE_STRUCTURAL_FIELDS
+
+    for name in TABLES:
+        prefix = f'{name}/'
+        columns = {}
+        for key, array in arrays.items():
+            if not key.startswith(prefix) or key[len(prefix):].startswith('__'):
+                continue
+            field = key[len(prefix):]
+            if field.endswith('.json'):
+                columns[field[:-5]] = np.array(_decode_json(array), dtype=object)
+            else:
+                columns[field] = array
+        table = ComponentTable.from_columns(
+            arrays[f'{prefix}__names__'].tolist(), columns,
+            structural_fields=LINE_STRUCTURAL_FIELDS if name == 'lines' else ()
+        )
+        table.version = int(arrays[f'{prefix}__version__'])
+        setattr(network, name, table)
+
+    # Solvers hold matrices of the old tables: rebuild them
+    network._index_components()
+    network.economic_dispatch = None
+    network.ac_power_flow = None
+    if network.power_flow_cache is not None:
+        network.power_flow_cache.clear()
+
+    scalars = _decode_json(arrays['network/scalars.json'])
+    network.set_dispatch_mode(scalars.pop('dispatch_mode'))
+    network.set_power_flow_mode(scalars.pop('power_flow_mode'))
+    for key, value in scalars.items():
+        setattr(network, key, value)
+    network.bus_injection = np.array(arrays['network/bus_injection'])
+    for name in BUS_ARRAYS:
+        if f'network/{name}' in arrays:
+            setattr(network, name, np.array(arrays[f'network/{name}']))
+
+    if coupler is not None and 'coupler/state.json' in arrays:
+        from contingency_analysis import ContingencyAnalyzer
+
+        coupler.power_network = network
+        coupler.contingency_analyzer = ContingencyAnalyzer(network, coupler.contingency_analyzer.overload_threshold)
+        if coupler.bus_index is not None:
+            coupler.use_bus_index(coupler.bus_index.bus_types)
+        for key, value in _decode_json(arrays['coupler/state.json']).items():
+            setattr(coupler, key, value)
+        history = {key[len('coupler/history/'):]: array for key, array in arrays.items()
+                   if key.startswith('coupler/history/')}
+        if history:
+            coupler.metrics_history.load_arrays(history)
+        coupler.invalidate_status()
+
+
+def save_snapshot(path, network, coupler=None):
+    """Write a full snapshot to one NPZ file"""
+    arrays = snapshot_arrays(network, coupler)
+    arrays['__meta__.json'] = _encode_json({'sequence': 0, 'full': True, 'time': time.time()})
+    np.savez(path, **arrays)
+
+
+def load_snapshot(path, network, coupler=None):
+    """
+    Restore from a snapshot file or a checkpoint directory.
+
+    For a directory, the latest checkpoint is restored by replaying the
+    incremental files written since the last full snapshot.
+    """
+    if not os.path.isdir(path):
+        with np.load(path) as data:
+            restore_arrays(dict(data), network, coupler)
+        return
+
+    files = sorted(glob.glob(os.path.join(path, 'checkpoint_*.npz')))
+    if not files:
+        raise FileNotFoundError(f"No checkpoints in {path}")
+
+    # Walk back to the most recent full snapshot, then apply deltas in order
+    chain = []
+    for filepath in reversed(files):
+        with np.load(filepath) as data:
+            chain.append(dict(data))
+        if _decode_json(chain[-1]['__meta__.json'])['full']:
+            break
+    else:
+        raise ValueError(f"No full snapshot in {path}")
+
+    arrays = {}
+    for delta in reversed(chain):
+        arrays.update(delta)
+        for key in _decode_json(delta['__meta__.json']).get('removed', []):
+            arrays.pop(key, None)
+    restore_arrays(arrays, network, coupler)
+
+
+def _checkpoint_sequence(path):
+    return int(os.path.basename(path)[11:17])
+
+
+class CheckpointWriter:
+    def __init__(self, directory, full_every=FULL_SNAPSHOT_EVERY, keep_last=KEEP_LAST_CHECKPOINTS,
+                 background=True):
+        """Write numbered incremental checkpoints into a directory, pruning all but the last keep_last"""
+        self.directory = directory
+        self.full_every = full_every
+        self.keep_last = keep_last
+        os.makedirs(directory, exist_ok=True)
+
+        existing = sorted(glob.glob(os.path.join(directory, 'checkpoint_*.npz')))
+        self.sequence = _checkpoint_sequence(existing[-1]) + 1 if existing else 0
+        self._last = None  # Arrays of the previous checkpoint
+        self._since_full = 0
+        self._full_sequences = []  # Full snapshots written by this writer
+
+        # File writes run on one background thread so the simulation loop does not wait on disk
+        self._executor = ThreadPoolExecutor(max_workers=1) if background else None
+        self._pending = None
+
+        self.last_write_ms = 0.0
+        self.last_changed_arrays = 0
+
+    def checkpoint(self, network, coupler=None):
+        """Write the arrays that changed since the last checkpoint (or everything, periodically)"""
+        start = time.perf_counter()
+        arrays = snapshot_arrays(network, coupler)
+        full = self._last is None or self._since_full >= self.full_every
+
+        if full:
+            changed = arrays
+            removed = []
+            self._since_full = 0
+            self._full_sequences.append(self.sequence)
+        else:
+            changed = {
+                key: array for key, array in arrays.items()
+                if key not in self._last or self._last[key].shape != array.shape
+                or self._last[key].dtype != array.dtype or not np.array_equal(self._last[key], array)
+            }
+            removed = [key for key in self._last if key not in arrays]
+            self._since_full += 1
+
+        # Copies, so later in-place updates by the simulation do not leak into queued writes
+        changed = {key: np.array(array, copy=True) for key, array in changed.items()}
+        changed['__meta__.json'] = _encode_json({
+            'sequence': self.sequence, 'full': full, 'removed': removed, 'time': time.time()
+        })
+        path = os.path.join(self.directory, f'checkpoint_{self.sequence:06d}.npz')
+
+        self.wait()
+        if self._executor is not None:
+            self._pending = self._executor.submit(self._write, path, changed, self.sequence)
+        else:
+            self._write(path, changed, self.sequence)
+
+        self._last = {key: np.array(array, copy=True) for key, array in arrays.items()}
+        self.sequence += 1
+        self.last_changed_arrays = len(changed) - 1
+        self.last_write_ms = (time.perf_counter() - start) * 1000
+        return path
+
+    def _write(self, path, arrays, sequence):
+        np.savez(path, **arrays)
+        self.prune(sequence)
+
+    def prune(self, sequence=None):
+        """
+        Delete checkpoints older than the last keep_last, keeping the full
+        snapshot the oldest kept delta replays from. Runs after each write,
+        so a restorable chain is on disk at all times. Returns the number of
+        files deleted.
+        """
+        if self.keep_last is None:
+            return 0
+        sequence = self.sequence - 1 if sequence is None else sequence
+        oldest = sequence - self.keep_last + 1
+        bases = [full for full in self._full_sequences if full <= oldest]
+        if not bases:
+            return 0
+        deleted = 0
+        for path in glob.glob(os.path.join(self.directory, 'checkpoint_*.npz')):
+            if _checkpoint_sequence(path) < bases[-1]:
+                os.remove(path)
+                deleted += 1
+        return deleted
+
+    def wait(self):
+        """Block until the previous background write has finished"""
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+
+    def close(self):
+        self.wait()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+def test_snapshots():
+    """Checkpoint a running network into a temporary directory and restore it"""
+    print("=" * 60)
+    print("Testing Binary State Snapshots")
+    print("=" * 60)
+
+    from pypsa_network_builder import NYCPowerNetworkSimple
+    from traffic_power_integration import TrafficPowerCoupler
+
+    network = NYCPowerNetworkSimple()
+    network.build_network()
+    coupler = TrafficPowerCoupler(network)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # A full snapshot every 4 checkpoints, keeping the last 3
+        writer = CheckpointWriter(directory, full_every=4, keep_last=3)
+        for minute in range(10):
+            network.current_hour = 8 + minute // 5
+            coupler.update_from_sumo({'vehicles': [], 'traffic_lights': [], 'simulation_time': minute * 60})
+            path = writer.checkpoint(network, coupler)
+            print(f"{os.path.basename(path)}: {writer.last_changed_arrays} arrays, {writer.last_write_ms:.2f} ms")
+        writer.close()
+        kept = sorted(os.path.basename(path) for path in glob.glob(os.path.join(directory, 'checkpoint_*.npz')))
+        print(f"\nKept after pruning: {', '.join(kept)}")
+
+        restored = NYCPowerNetworkSimple()
+        restored_coupler = TrafficPowerCoupler(restored)
+        start = time.perf_counter()
+        load_snapshot(directory, restored, restored_coupler)
+        print(f"Restored in {(time.perf_counter() - start) * 1000:.1f} ms")
+        print(f"Status matches: {restored.get_status() == network.get_status()}")
+        print(f"History samples: {len(restored_coupler.metrics_history)}")
+    return restored
+
+if __name__ == "__main__":
+    test_snapshots()
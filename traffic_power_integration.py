@@ -9,6 +9,33 @@ import time
 import json
 from datetime import datetime
 import numpy as np
+from ev_energy_model import EVEnergyModel
+from contingency_analysis import ContingencyAnalyzer
+from zone_classifier import ZoneClassifier, ZoneGrid, DEFAULT_CELL_DEG
+from bus_index import NearestBusIndex, DEFAULT_BUS_TYPES
+from metric_history import MetricHistory
+from power_events import PowerEventEngine
+from outage_coupling import TrafficLightFeederIndex, lost_buses
+
+HISTORY_FIELDS = ('vehicle_count', 'total_generation_mw', 'total_load_mw', 'traffic_infrastructure_mw',
+                  'ev_charging_mw', 'contingency_violations')
+
+# Traffic light state codes for array frames (see update_from_arrays)
+LIGHT_GREEN, LIGHT_YELLOW, LIGHT_RED, LIGHT_OFF = 0, 1, 2, 3
+
+
+def encode_light_states(states):
+    """Code per SUMO state string: red if any link is red, else yellow, else green, else off"""
+    codes = np.full(len(states), LIGHT_OFF, dtype=np.uint8)
+    for i, state in enumerate(states):
+        state = state.lower()
+        if 'r' in state:
+            codes[i] = LIGHT_RED
+        elif 'y' in state:
+            codes[i] = LIGHT_YELLOW
+        elif 'g' in state:
+            codes[i] = LIGHT_GREEN
+    return codes
 
 class TrafficPowerCoupler:
     def __init__(self, power_network):
@@ -17,8 +44,10 @@ class TrafficPowerCoupler:
         
         # Traffic data from SUMO
         self.vehicle_count = 0
-        self.traffic_light_states = {}
-        self.vehicle_positions = []
+        self.light_count = 0
+        self.vehicle_lat = self.vehicle_lon = np.zeros(0)
+        self.vehicle_dynamics = None  # (speed, acceleration, slope, is_ev) arrays when SUMO provides them
+        self.light_state = np.zeros(0, dtype=np.uint8)
         self.traffic_density_by_area = {
             'Manhattan': 0,
             'Brooklyn': 0,
@@ -30,83 +59,244 @@ class TrafficPowerCoupler:
         self.traffic_light_power = 0.0005  # MW per traffic light
         self.street_light_dimming_factor = 1.0  # Adaptive street lighting
         self.ev_charging_probability = 0.05  # 5% of vehicles are charging EVs
-        
-        # Metrics for visualization
-        self.metrics_history = []
-        self.power_events = []
+        self.ev_share = 0.15  # Fraction of vehicles assumed electric when not flagged
+        self.ev_recharge_ratio = 1.0  # Fleet charging demand per MW of net driving consumption
+        
+        # Vehicle energy model (feeds EV charging loads when speeds are known)
+        self.ev_energy_model = EVEnergyModel()
+        
+        # Borough zones (boxes by default, see set_zones for real polygons)
+        self.zone_classifier = ZoneClassifier.boroughs()
+        self.zone_names = self.zone_classifier.zone_names
+        self.ev_energy_by_area = {}
+        self.ev_station_mw = {}  # Charging-session power per EV load, set by the session engine
+        
+        # Nearest-bus assignment (see use_bus_index); replaces the borough load buckets when set
+        self.bus_index = None
+        self.vehicles_by_bus = None
+        self.lights_by_bus = None
+        self.active_lights_by_bus = None
+        self.bus_ev_driving_mw = None
+        self.bus_station_mw = None
+        
+        # Traffic lights per supplying bus, for outage coupling (rebuilt when the light set changes)
+        self.feeder_index = None
+        self.lights_out = []
+        self.lines_out = []  # Lines tripped by simulate_power_outage, back in service on restore_power
+        
+        # N-1 contingency screening (every contingency_interval_s of simulated time)
+        self.contingency_analyzer = ContingencyAnalyzer(power_network)
+        self.contingency_interval_s = 300
+        self.last_contingency_time = None
+        self.contingency_results = []
+        
+        # Metrics for visualization (ring buffer with 1 s / 1 min / 1 h rollups)
+        self.metrics_history = MetricHistory(HISTORY_FIELDS)
+        self.power_events = []  # Event transitions of the last update
+        self.event_engine = PowerEventEngine()
+        
+        # Status built at most once per tick and shared by every reader (see get_current_status)
+        self.tick = 0  # Advanced by every update and by outage/contingency changes
+        self._status = None
+        self._status_tick = None
         
     def update_from_sumo(self, sumo_data):
-        """Update coupling based on SUMO simulation data"""
-        # Extract data from SUMO
+        """Update coupling based on SUMO simulation data (lists of vehicle and traffic light dicts)"""
         vehicles = sumo_data.get('vehicles', [])
         traffic_lights = sumo_data.get('traffic_lights', [])
         
-        self.vehicle_count = len(vehicles)
-        self.vehicle_positions = vehicles
-        
-        # Update traffic light states
-        self.traffic_light_states = {}
-        for tl in traffic_lights:
-            self.traffic_light_states[tl['id']] = tl['state']
+        frame = {
+            'simulation_time': sumo_data.get('simulation_time'),
+            'vehicle_lat': np.array([vehicle.get('y', 0) for vehicle in vehicles], dtype=np.float64),
+            'vehicle_lon': np.array([vehicle.get('x', 0) for vehicle in vehicles], dtype=np.float64),
+            'light_state': encode_light_states([tl['state'] for tl in traffic_lights])
+        }
+        if vehicles and 'speed' in vehicles[0]:
+            frame['vehicle_speed'] = np.array([vehicle['speed'] for vehicle in vehicles], dtype=np.float64)
+            frame['vehicle_acceleration'] = np.array([vehicle.get('acceleration', 0) for vehicle in vehicles],
+                                                     dtype=np.float64)
+            frame['vehicle_slope'] = np.array([vehicle.get('slope', 0) for vehicle in vehicles], dtype=np.float64)
+            if 'is_ev' in vehicles[0]:
+                frame['vehicle_is_ev'] = np.array([vehicle['is_ev'] for vehicle in vehicles], dtype=bool)
+        if traffic_lights and 'x' in traffic_lights[0]:
+            frame['light_ids'] = [tl['id'] for tl in traffic_lights]
+            frame['light_lat'] = np.array([tl['y'] for tl in traffic_lights], dtype=np.float64)
+            frame['light_lon'] = np.array([tl['x'] for tl in traffic_lights], dtype=np.float64)
+        
+        return self.update_from_arrays(frame)
+    
+    def update_from_arrays(self, frame):
+        """
+        Update coupling from struct-of-arrays frame data.
+        
+        frame keys:
+            simulation_time (float): Simulated time of the frame (optional).
+            vehicle_lat, vehicle_lon (array): Vehicle coordinates.
+            vehicle_speed, vehicle_acceleration, vehicle_slope, vehicle_is_ev (array):
+                Optional dynamics for the EV energy model (speed enables it).
+            light_state (array): Traffic light state codes (LIGHT_GREEN ... LIGHT_OFF).
+            light_ids, light_lat, light_lon: Optional light IDs and coordinates, for bus
+                assignment and outage coupling. Pass the same ids object every frame so
+                the feeder index is not rebuilt.
+        
+        Float64 and uint8 arrays are used as given, never copied.
+        """
+        self.tick += 1
+        self.vehicle_lat = np.asarray(frame['vehicle_lat'], dtype=np.float64)
+        self.vehicle_lon = np.asarray(frame['vehicle_lon'], dtype=np.float64)
+        self.vehicle_count = len(self.vehicle_lat)
+        self.light_state = np.asarray(frame.get('light_state', self.light_state[:0]), dtype=np.uint8)
+        self.light_count = len(self.light_state)
+        
+        self.vehicle_dynamics = None
+        if frame.get('vehicle_speed') is not None:
+            self.vehicle_dynamics = (frame['vehicle_speed'], frame.get('vehicle_acceleration', 0.0),
+                                     frame.get('vehicle_slope'), frame.get('vehicle_is_ev'))
+        
+        light_lat, light_lon = frame.get('light_lat'), frame.get('light_lon')
         
         # Calculate traffic density by area
-        self._calculate_traffic_density()
+        self._calculate_traffic_density(self.vehicle_lat, self.vehicle_lon)
+        if self.bus_index is not None:
+            self._assign_to_buses(light_lat, light_lon)
+        if frame.get('light_ids') is not None and light_lat is not None:
+            self._update_feeder_index(frame['light_ids'], light_lat, light_lon)
         
         # Update power network loads
         self._update_power_loads()
         
         # Check for power events
-        self._check_power_events()
+        simulation_time = frame.get('simulation_time')
+        self._check_power_events(simulation_time if simulation_time is not None else self.power_network.clock.time_s)
         
-        return self.get_current_status()
+        # Periodic N-1 screening
+        if simulation_time is not None and (
+            self.last_contingency_time is None
+            or simulation_time - self.last_contingency_time >= self.contingency_interval_s
+        ):
+            self.run_contingency_analysis()
+            self.last_contingency_time = simulation_time
+        
+        status = self.get_current_status()
+        self._record_history(simulation_time if simulation_time is not None else self.power_network.clock.time_s, status)
+        return status
+    
+    def _record_history(self, time_s, status):
+        """Append the headline metrics of a status to the history"""
+        self.metrics_history.append(time_s, {
+            'vehicle_count': self.vehicle_count,
+            'total_generation_mw': status['power']['total_generation_mw'],
+            'total_load_mw': status['power']['total_load_mw'],
+            'traffic_infrastructure_mw': status['power']['traffic_infrastructure_mw'],
+            'ev_charging_mw': status['power']['ev_charging_mw'],
+            'contingency_violations': status['contingencies']['violations']
+        })
     
-    def _calculate_traffic_density(self):
-        """Calculate traffic density for each borough"""
-        # Reset densities
+    def _calculate_traffic_density(self, lat, lon):
+        """Calculate traffic density for each borough from vehicle coordinate arrays"""
+        # Count vehicles in each area, all vehicles classified at once
         for area in self.traffic_density_by_area:
             self.traffic_density_by_area[area] = 0
-        
-        # Count vehicles in each area based on coordinates
-        for vehicle in self.vehicle_positions:
-            lat, lon = vehicle.get('y', 0), vehicle.get('x', 0)
-            
-            # Simplified borough boundaries
-            if 40.7 < lat < 40.85 and -74.02 < lon < -73.93:
-                self.traffic_density_by_area['Manhattan'] += 1
-            elif 40.57 < lat < 40.7 and -74.04 < lon < -73.83:
-                self.traffic_density_by_area['Brooklyn'] += 1
-            elif 40.7 < lat < 40.8 and -73.93 < lon < -73.7:
-                self.traffic_density_by_area['Queens'] += 1
-            elif lat > 40.85:
-                self.traffic_density_by_area['Bronx'] += 1
+        self.traffic_density_by_area.update(self.zone_classifier.count(lat, lon))
+    
+    def set_zones(self, zones):
+        """Use custom zones: {name: Polygon, (lon, lat) points or lat/lon box}, first match wins"""
+        self.zone_classifier = ZoneClassifier(zones)
+        self.zone_names = self.zone_classifier.zone_names
+        for name in self.zone_names:
+            self.traffic_density_by_area.setdefault(name, 0)
+    
+    def use_zone_grid(self, bounds, cache_path=None, cell_deg=DEFAULT_CELL_DEG):
+        """Rasterize the current zones over bounds (lat_min, lat_max, lon_min, lon_max) for O(1) lookups"""
+        classifier = getattr(self.zone_classifier, 'classifier', self.zone_classifier)
+        if cache_path:
+            self.zone_classifier = ZoneGrid.cached(classifier, bounds, cache_path, cell_deg)
+        else:
+            self.zone_classifier = ZoneGrid(classifier, bounds, cell_deg)
+    
+    def use_bus_index(self, bus_types=DEFAULT_BUS_TYPES):
+        """Assign traffic lights, vehicles and EV stations to their nearest bus instead of borough buckets"""
+        self.bus_index = NearestBusIndex(self.power_network, bus_types)
+        n_buses = self.bus_index.n_buses
+        self.vehicles_by_bus = np.zeros(n_buses)
+        self.lights_by_bus = np.zeros(n_buses)
+        self.active_lights_by_bus = np.zeros(n_buses)
+        self.bus_ev_driving_mw = np.zeros(n_buses)
+        self.bus_station_mw = np.zeros(n_buses)
+        
+        # The per-bus loads take over from the named traffic light and EV loads
+        self.power_network.traffic_light_loads.column('current_mw')[:] = 0.0
+        self.power_network.ev_charging_loads.column('current_mw')[:] = 0.0
+        return self.bus_index
+    
+    def _assign_to_buses(self, light_lat, light_lon):
+        """Count vehicles, traffic lights and actively controlling lights per bus"""
+        index = self.bus_index
+        self.vehicles_by_bus = index.aggregate(self.vehicle_lat, self.vehicle_lon)
+        
+        if light_lat is None:
+            # Lights without coordinates cannot be placed on a bus
+            self.lights_by_bus = np.zeros(index.n_buses)
+            self.active_lights_by_bus = np.zeros(index.n_buses)
+            return
+        light_bus = index.assign(light_lat, light_lon)
+        self.lights_by_bus = index.bus_totals(light_bus)
+        self.active_lights_by_bus = index.bus_totals(light_bus, self._active_lights().astype(np.float64))
+    
+    def _active_lights(self):
+        """Lights actively controlling traffic (yellow or red)"""
+        return (self.light_state == LIGHT_YELLOW) | (self.light_state == LIGHT_RED)
+    
+    def _update_feeder_index(self, light_ids, light_lat, light_lon):
+        """Precompute the supplying bus of every traffic light when the set of lights changes"""
+        if len(light_ids) == 0:
+            return
+        if self.feeder_index is not None and self.feeder_index.matches(light_ids):
+            return
+        self.feeder_index = TrafficLightFeederIndex(self.power_network, light_ids, light_lat, light_lon,
+                                                    self.bus_index)
+    
+    def _update_bus_loads(self):
+        """Traffic light load per bus from its lights, their control state and the local vehicle density"""
+        density_factor = np.minimum(2.0, 1.0 + self.vehicles_by_bus / 1000)
+        control_factor = 1.0 + self.active_lights_by_bus / np.maximum(self.lights_by_bus, 1) * 0.2
+        self.power_network.set_bus_loads(
+            traffic_light_mw=self.lights_by_bus * self.traffic_light_power * control_factor * density_factor
+            * self.power_network.bus_energized
+        )
+    
+    def _set_bus_ev_charging(self):
+        """Push driving-energy recharge plus station power per bus to the network"""
+        self.power_network.set_bus_loads(
+            ev_charging_mw=(self.bus_ev_driving_mw + self.bus_station_mw) * self.power_network.bus_energized
+        )
     
     def _update_power_loads(self):
         """Update power network loads based on traffic conditions"""
-        # Update traffic light loads based on states
-        total_tl_power = len(self.traffic_light_states) * self.traffic_light_power
-        
         # More complex state = more power (controllers working harder)
-        yellow_count = sum(1 for state in self.traffic_light_states.values() if 'y' in state.lower())
-        red_count = sum(1 for state in self.traffic_light_states.values() if 'r' in state.lower())
+        active_count = int(np.count_nonzero(self._active_lights()))
         
         # Power factor increases with more yellow/red (active control)
-        control_factor = 1.0 + (yellow_count + red_count) / max(len(self.traffic_light_states), 1) * 0.2
-        
-        # Update traffic light loads by area
-        if 'TL_Manhattan' in self.power_network.traffic_light_loads:
-            density_factor = min(2.0, 1.0 + self.traffic_density_by_area['Manhattan'] / 1000)
-            self.power_network.traffic_light_loads['TL_Manhattan']['current_mw'] = \
-                self.power_network.traffic_light_loads['TL_Manhattan']['base_mw'] * control_factor * density_factor
-        
-        if 'TL_Brooklyn' in self.power_network.traffic_light_loads:
-            density_factor = min(2.0, 1.0 + self.traffic_density_by_area['Brooklyn'] / 1000)
-            self.power_network.traffic_light_loads['TL_Brooklyn']['current_mw'] = \
-                self.power_network.traffic_light_loads['TL_Brooklyn']['base_mw'] * control_factor * density_factor
-        
-        if 'TL_Queens' in self.power_network.traffic_light_loads:
-            density_factor = min(2.0, 1.0 + self.traffic_density_by_area['Queens'] / 1000)
-            self.power_network.traffic_light_loads['TL_Queens']['current_mw'] = \
-                self.power_network.traffic_light_loads['TL_Queens']['base_mw'] * control_factor * density_factor
+        control_factor = 1.0 + active_count / max(self.light_count, 1) * 0.2
+        
+        # Update traffic light loads per bus, or by area
+        if self.bus_index is not None:
+            self._update_bus_loads()
+        else:
+            if 'TL_Manhattan' in self.power_network.traffic_light_loads:
+                density_factor = min(2.0, 1.0 + self.traffic_density_by_area['Manhattan'] / 1000)
+                self.power_network.traffic_light_loads['TL_Manhattan']['current_mw'] = \
+                    self.power_network.traffic_light_loads['TL_Manhattan']['base_mw'] * control_factor * density_factor
+            
+            if 'TL_Brooklyn' in self.power_network.traffic_light_loads:
+                density_factor = min(2.0, 1.0 + self.traffic_density_by_area['Brooklyn'] / 1000)
+                self.power_network.traffic_light_loads['TL_Brooklyn']['current_mw'] = \
+                    self.power_network.traffic_light_loads['TL_Brooklyn']['base_mw'] * control_factor * density_factor
+            
+            if 'TL_Queens' in self.power_network.traffic_light_loads:
+                density_factor = min(2.0, 1.0 + self.traffic_density_by_area['Queens'] / 1000)
+                self.power_network.traffic_light_loads['TL_Queens']['current_mw'] = \
+                    self.power_network.traffic_light_loads['TL_Queens']['base_mw'] * control_factor * density_factor
         
         # Update EV charging loads based on vehicle count and density
         self._update_ev_charging()
@@ -117,15 +307,82 @@ class TrafficPowerCoupler:
         # Run power flow simulation
         self.power_network.simulate_power_flow()
     
+    def _classify_zones(self, lat, lon):
+        """Vectorized zone lookup, returns an index into zone_names (-1 = none)"""
+        return self.zone_classifier.classify(lat, lon)
+    
+    def set_station_charging(self, load_mw):
+        """Set charging-station power per EV load ({load_name: MW}) from the session engine"""
+        self.ev_station_mw = dict(load_mw)
+    
+    def set_station_power(self, lat, lon, power_mw):
+        """Set charging-station power per station (arrays), aggregated onto the nearest buses"""
+        self.ev_station_mw = {}
+        self.bus_station_mw = self.bus_index.aggregate(lat, lon, np.asarray(power_mw, dtype=np.float64))
+        self._set_bus_ev_charging()
+    
+    def update_ev_energy(self, lat, lon, speed, acceleration, slope=None, is_ev=None):
+        """
+        Compute EV driving energy for the whole fleet and feed it to the EV charging loads.
+        
+        All arguments are per-vehicle arrays. Without an is_ev flag every vehicle
+        is weighted by ev_share. Returns per-area energy in MW.
+        """
+        zone_index = self._classify_zones(lat, lon)
+        weights = np.asarray(is_ev, dtype=np.float64) if is_ev is not None else self.ev_share
+        
+        battery_kw = self.ev_energy_model.battery_power_kw(speed, acceleration, slope)
+        energy = self.ev_energy_model.aggregate_by_zone(battery_kw, zone_index, len(self.zone_names), weights)
+        
+        self.ev_energy_by_area = {
+            area: {
+                'consumption_mw': round(float(energy['consumption_mw'][i]), 4),
+                'regeneration_mw': round(float(energy['regeneration_mw'][i]), 4),
+                'net_mw': round(float(energy['net_mw'][i]), 4)
+            }
+            for i, area in enumerate(self.zone_names)
+        }
+        
+        # In steady state the chargers must put back what the fleet uses on the road,
+        # on top of what is measured at the public stations
+        if self.bus_index is not None:
+            bus_energy = self.ev_energy_model.aggregate_by_zone(
+                battery_kw, self.bus_index.assign(lat, lon), self.bus_index.n_buses, weights
+            )
+            self.bus_ev_driving_mw = np.maximum(bus_energy['net_mw'], 0.0) * self.ev_recharge_ratio
+            self._set_bus_ev_charging()
+            return self.ev_energy_by_area
+        
+        demand = {
+            f'EV_{area}': max(0.0, float(energy['net_mw'][i])) * self.ev_recharge_ratio
+            for i, area in enumerate(self.zone_names)
+        }
+        for name, mw in self.ev_station_mw.items():
+            demand[name] = demand.get(name, 0.0) + mw
+        self.power_network.set_ev_charging_demand(demand)
+        
+        return self.ev_energy_by_area
+    
     def _update_ev_charging(self):
         """Update EV charging loads based on traffic patterns"""
+        # Use the energy model when SUMO provides vehicle dynamics
+        if self.vehicle_dynamics is not None:
+            self.update_ev_energy(self.vehicle_lat, self.vehicle_lon, *self.vehicle_dynamics)
+            return
+        
+        # Estimate EVs charging per bus from the local vehicle count (50 kW average)
+        if self.bus_index is not None:
+            self.bus_ev_driving_mw = self.vehicles_by_bus * self.ev_share * self.ev_charging_probability * 0.05
+            self._set_bus_ev_charging()
+            return
+        
         # Estimate EVs charging based on stopped vehicles and density
-        base_ev_count = self.vehicle_count * 0.15  # 15% of vehicles are EVs
+        base_ev_count = self.vehicle_count * self.ev_share
         
         # Calculate charging demand by area
-        manhattan_evs = self.traffic_density_by_area['Manhattan'] * 0.15
-        brooklyn_evs = self.traffic_density_by_area['Brooklyn'] * 0.15
-        queens_evs = self.traffic_density_by_area['Queens'] * 0.15
+        manhattan_evs = self.traffic_density_by_area['Manhattan'] * self.ev_share
+        brooklyn_evs = self.traffic_density_by_area['Brooklyn'] * self.ev_share
+        queens_evs = self.traffic_density_by_area['Queens'] * self.ev_share
         
         # Charging probability increases in high-density areas (more likely to find chargers)
         manhattan_charging = manhattan_evs * 0.1 * 0.05  # 10% charging, 50kW average
@@ -153,13 +410,8 @@ class TrafficPowerCoupler:
     
     def _update_street_lighting(self):
         """Update street lighting based on traffic density (smart lighting)"""
-        hour = self.power_network.current_hour
-        
-        # Base lighting schedule
-        if hour < 6 or hour > 18:  # Night time
-            base_factor = 1.0
-        else:  # Day time
-            base_factor = 0.0
+        # Base lighting schedule (on at night) from the clock's profile table
+        base_factor = self.power_network.clock.value('street_light')
         
         # Adaptive lighting based on traffic
         for area in ['Manhattan', 'Brooklyn', 'Queens']:
@@ -171,43 +423,29 @@ class TrafficPowerCoupler:
                 self.power_network.street_light_loads[sl_key]['current_mw'] = \
                     self.power_network.street_light_loads[sl_key]['base_mw'] * base_factor * traffic_factor
     
-    def _check_power_events(self):
-        """Check for power events that affect traffic"""
-        events = []
-        
-        # Check for overload conditions
-        for line_name, line in self.power_network.lines.items():
-            utilization = (line['current_flow'] / line['capacity_mw']) * 100 if line['capacity_mw'] > 0 else 0
-            
-            if utilization > 90:
-                events.append({
-                    'type': 'line_overload',
-                    'severity': 'warning',
-                    'line': line_name,
-                    'utilization': utilization,
-                    'message': f"Line {line_name} at {utilization:.1f}% capacity"
-                })
-            
-            if utilization > 100:
-                events.append({
-                    'type': 'line_trip',
-                    'severity': 'critical',
-                    'line': line_name,
-                    'utilization': utilization,
-                    'message': f"Line {line_name} tripped! Traffic lights may fail.",
-                    'traffic_impact': self._calculate_outage_impact(line_name)
-                })
-        
-        # Check generation adequacy
-        balance = self.power_network.total_generation - self.power_network.total_load
-        if balance < 0:
-            events.append({
-                'type': 'generation_shortage',
-                'severity': 'critical',
-                'shortage_mw': abs(balance),
-                'message': f"Generation shortage: {abs(balance):.1f} MW",
-                'action': 'load_shedding'
-            })
+    def _check_power_events(self, time_s):
+        """Raise/clear power events that affect traffic (hysteresis and minimum durations)"""
+        network = self.power_network
+        
+        # Bus voltages come from the AC power flow only (nominal otherwise, which clears them);
+        # NaN after a failed AC solve neither raises nor clears voltage events
+        if network.power_flow_mode == 'ac' and 'voltage_pu' in network.buses.columns:
+            voltage = network.buses.column('voltage_pu')
+        else:
+            voltage = np.ones(len(network.buses))
+        
+        # All lines and buses evaluated at once, flows are signed and utilization uses magnitude
+        events = self.event_engine.update(time_s, {
+            'line': (network.lines.names, network.get_line_utilization()),
+            'bus': (network.buses.names, voltage),
+            'system': (['system'], [network.total_load - network.total_generation])
+        })
+        
+        for event in events:
+            if event['type'] == 'line_trip' and event['state'] == 'raised':
+                event['traffic_impact'] = self._calculate_outage_impact(event['element'])
+            elif event['type'] == 'generation_shortage' and event['state'] == 'raised':
+                event['action'] = 'load_shedding'
         
         self.power_events = events
         return events
@@ -232,57 +470,156 @@ class TrafficPowerCoupler:
             impact['affected_traffic_lights'] = line_area_map[line_name]['lights']
             impact['estimated_delay_minutes'] = line_area_map[line_name]['delay']
         
+        # Actual lights cut off behind the line when their positions are known
+        if self.feeder_index is not None:
+            impact['affected_traffic_lights'] = len(self.feeder_index.lights_for_lines([line_name]))
+        
         return impact
     
-    def simulate_power_outage(self, area):
-        """Simulate a power outage in a specific area"""
-        print(f"⚠️ Simulating power outage in {area}...")
-        
-        # Set loads to zero in affected area
-        if area == 'Manhattan':
-            self.power_network.traffic_light_loads['TL_Manhattan']['current_mw'] = 0
-            self.power_network.street_light_loads['SL_Manhattan']['current_mw'] = 0
-            return {'affected_lights': 500, 'message': 'Manhattan traffic lights offline'}
-        
-        return {'affected_lights': 0, 'message': 'No impact'}
+    def run_contingency_analysis(self):
+        """Evaluate all single-line outages and attach their traffic-light impact"""
+        self.tick += 1
+        results = self.contingency_analyzer.run()
+        
+        for result in results:
+            # Feeders that lose supply: the outaged line, lines into islanded buses,
+            # and lines that would trip on overload afterwards
+            failed = {o['line'] for o in result['overloaded_lines'] if o['utilization'] > 100}
+            if result['islanding']:
+                failed.add(result['outage'])
+                failed.update(name for name, line in self.power_network.lines.items()
+                              if line['to'] in result['lost_buses'])
+            impacts = [self._calculate_outage_impact(name) for name in sorted(failed)]
+            
+            result['traffic_impact'] = {
+                'affected_traffic_lights': sum(i['affected_traffic_lights'] for i in impacts),
+                'affected_areas': sorted({a for i in impacts for a in i['affected_areas']}),
+                'estimated_delay_minutes': max([i['estimated_delay_minutes'] for i in impacts], default=0)
+            }
+        
+        self.contingency_results = results
+        return results
+    
+    def simulate_power_outage(self, area=None, lines=None):
+        """
+        Simulate a power outage in a zone (area name) or behind failed lines (names).
+        
+        Failed lines are taken out of service, the affected buses are
+        de-energized (on top of earlier outages) and the network is re-solved.
+        Returns the IDs of the traffic lights that newly go dark, for the SUMO
+        side to switch off.
+        """
+        network = self.power_network
+        if lines:
+            buses = lost_buses(network, lines)
+            for name in lines:
+                network.set_line_status(name, False)
+            self.lines_out = self.lines_out + [name for name in lines if name not in self.lines_out]
+            label = ', '.join(lines)
+        elif area in self.zone_names:
+            zone = self._classify_zones(network.buses.column('lat'), network.buses.column('lon'))
+            buses = np.flatnonzero(zone == self.zone_names.index(area))
+            label = area
+        else:
+            return {'affected_lights': 0, 'light_ids': [], 'buses': [], 'message': 'No impact'}
+        
+        print(f"⚠️ Simulating power outage in {label}...")
+        self.tick += 1
+        network.set_bus_outage(np.union1d(buses, np.flatnonzero(~network.bus_energized)))  # Outages add up
+        if self.bus_index is not None:
+            self._update_bus_loads()
+            self._set_bus_ev_charging()
+        network.simulate_power_flow()
+        
+        light_ids = self.feeder_index.lights_on_buses(buses).tolist() if self.feeder_index is not None else []
+        already_out = set(self.lights_out)
+        light_ids = [light_id for light_id in light_ids if light_id not in already_out]
+        self.lights_out = self.lights_out + light_ids
+        return {
+            'affected_lights': len(light_ids),
+            'light_ids': light_ids,
+            'buses': [network.buses.names[b] for b in buses.tolist()],
+            'message': f"{label}: {len(buses)} buses and {len(light_ids)} traffic lights offline"
+        }
+    
+    def restore_power(self):
+        """End the simulated outage; returns the IDs of the traffic lights to switch back on"""
+        self.tick += 1
+        network = self.power_network
+        for name in self.lines_out:
+            network.set_line_status(name, True)
+        self.lines_out = []
+        network.set_bus_outage([])
+        if self.bus_index is not None:
+            self._update_bus_loads()
+            self._set_bus_ev_charging()
+        network.simulate_power_flow()
+        
+        light_ids, self.lights_out = self.lights_out, []
+        return {
+            'restored_lights': len(light_ids),
+            'light_ids': light_ids,
+            'message': f"Power restored, {len(light_ids)} traffic lights back on"
+        }
     
     def get_current_status(self):
-        """Get current status of the coupled system"""
+        """
+        Get current status of the coupled system.
+        
+        Built at most once per tick: every caller in the same tick gets the
+        same object, which must be treated as read-only.
+        """
+        if self._status is None or self._status_tick != self.tick:
+            self._status = self._build_status()
+            self._status_tick = self.tick
+        return self._status
+    
+    def invalidate_status(self):
+        """Force the next get_current_status to rebuild (after changing state from outside)"""
+        self.tick += 1
+    
+    def _build_status(self):
+        """Assemble the status dict from the network and coupler state"""
         power_status = self.power_network.get_status()
         
         status = {
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'traffic': {
                 'vehicle_count': self.vehicle_count,
-                'traffic_lights': len(self.traffic_light_states),
-                'density_by_area': self.traffic_density_by_area
+                'traffic_lights': self.light_count,
+                'density_by_area': dict(self.traffic_density_by_area)
             },
             'power': {
                 'total_generation_mw': power_status['total_generation_mw'],
                 'total_load_mw': power_status['total_load_mw'],
                 'traffic_infrastructure_mw': power_status['traffic_light_load_mw'] + power_status['street_light_load_mw'],
                 'ev_charging_mw': power_status['ev_charging_load_mw'],
-                'line_utilization': power_status['line_utilization']
+                'ev_energy_by_area': self.ev_energy_by_area,
+                'line_utilization': power_status['line_utilization'],
+                'bus_voltages_pu': power_status['bus_voltages_pu'],
+                'solver_cache': (self.power_network.power_flow_cache.get_statistics()
+                                 if self.power_network.power_flow_cache is not None else None)
             },
             'coupling_metrics': {
                 'traffic_power_ratio': self.vehicle_count / max(power_status['total_load_mw'], 1),
                 'ev_penetration': (power_status['ev_charging_load_mw'] / max(self.vehicle_count * 0.001, 1)) if self.vehicle_count > 0 else 0,
-                'infrastructure_efficiency': (power_status['traffic_light_load_mw'] / max(len(self.traffic_light_states) * 0.001, 1)) if len(self.traffic_light_states) > 0 else 0
+                'infrastructure_efficiency': (power_status['traffic_light_load_mw'] / max(self.light_count * 0.001, 1)) if self.light_count > 0 else 0
             },
-            'events': self.power_events
+            'events': self.power_events,
+            'active_events': self.event_engine.active_count(),
+            'contingencies': {
+                'violations': len(self.contingency_results),
+                'worst': self.contingency_results[:3],
+                'solve_ms': round(self.contingency_analyzer.last_run_ms, 2)
+            }
         }
         
-        # Store in history
-        self.metrics_history.append(status)
-        if len(self.metrics_history) > 100:  # Keep last 100 records
-            self.metrics_history.pop(0)
-        
         return status
     
     def get_optimization_recommendations(self):
         """Get recommendations for optimizing the coupled system"""
         recommendations = []
-        status = self.get_current_status()
+        status = self.get_current_status()  # Cached for this tick, not rebuilt
         
         # Check EV charging optimization
         if status['power']['ev_charging_mw'] > status['power']['total_generation_mw'] * 0.1:
@@ -359,6 +696,17 @@ def test_integration():
         for rec in recommendations:
             print(f"- [{rec['priority']}] {rec['message']}")
     
+    # The same frame as struct-of-arrays data (no per-vehicle dicts)
+    offsets = np.arange(1000) * 0.001
+    frame = {
+        'vehicle_lat': 40.75 + offsets,
+        'vehicle_lon': -73.98 + offsets,
+        'light_state': np.tile(np.array([LIGHT_RED, LIGHT_GREEN], dtype=np.uint8), 50)
+    }
+    start = time.perf_counter()
+    status = coupler.update_from_arrays(frame)
+    print(f"\nArray frame: {status['power']['total_load_mw']} MW in {(time.perf_counter() - start) * 1000:.1f} ms")
+    
     print("\n✅ Traffic-Power Integration ready!")
     return coupler
 
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Vectorized Zone Classification
+Maps arrays of vehicle or traffic light coordinates to borough/feeder zones
+in one pass, using lat/lon boxes or real polygons (tools.util.geometry.Polygon).
+ZoneGrid rasterizes the zones into a cached integer grid so a lookup is a
+single array index, with an exact test only for cells on zone boundaries
+"""
+
+import os
+import hashlib
+import numpy as np
+
+from tools.util.geometry import Polygon
+
+BOUNDARY = -2  # Grid cells crossed by a zone edge (resolved with the exact test)
+DEFAULT_CELL_DEG = 0.0005  # About 50 m
+
+# Simplified borough boundaries: (lat_min, lat_max, lon_min, lon_max), open
+# intervals, None = unbounded. The first matching zone wins.
+BOROUGH_BOXES = {
+    'Manhattan': (40.7, 40.85, -74.02, -73.93),
+    'Brooklyn': (40.57, 40.7, -74.04, -73.83),
+    'Queens': (40.7, 40.8, -73.93, -73.7),
+    'Bronx': (40.85, None, None, None)
+}
+
+
+def points_in_polygon(polygon, lat, lon):
+    """Even-odd ray casting for arrays of points against one polygon of (lon, lat) vertices"""
+    points = np.asarray(polygon.points if isinstance(polygon, Polygon) else polygon, dtype=np.float64)
+    x1, y1 = points[:, 0], points[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+
+    inside = np.zeros(np.shape(lat), dtype=bool)
+    for i in range(len(points)):
+        if y1[i] == y2[i]:
+            continue
+        crosses = (y1[i] > lat) != (y2[i] > lat)
+        x_cross = x1[i] + (lat - y1[i]) * (x2[i] - x1[i]) / (y2[i] - y1[i])
+        inside ^= crosses & (lon < x_cross)
+    return inside
+
+
+class ZoneClassifier:
+    def __init__(self, zones):
+        """
+        Initialize from an ordered {name: shape} mapping.
+
+        A shape is a (lat_min, lat_max, lon_min, lon_max) box or a polygon
+        (tools.util.geometry.Polygon or a list of (lon, lat) points).
+        """
+        self.zone_names = list(zones)
+        self.shapes = []
+        for shape in zones.values():
+            if isinstance(shape, Polygon):
+                self.shapes.append(shape)
+            elif len(shape) == 4 and not isinstance(shape[0], (tuple, list)):
+                self.shapes.append(tuple(shape))
+            else:
+                self.shapes.append(Polygon([tuple(p) for p in shape]))
+
+    @classmethod
+    def boroughs(cls):
+        """The simplified NYC borough boxes"""
+        return cls(BOROUGH_BOXES)
+
+    def zone_mask(self, i, lat, lon):
+        """Boolean mask of the points inside zone i"""
+        shape = self.shapes[i]
+        if isinstance(shape, Polygon):
+            return points_in_polygon(shape, lat, lon)
+        mask = np.ones(np.shape(lat), dtype=bool)
+        for value, bound, above in ((lat, shape[0], True), (lat, shape[1], False),
+                                    (lon, shape[2], True), (lon, shape[3], False)):
+            if bound is not None:
+                mask &= (value > bound) if above else (value < bound)
+        return mask
+
+    def classify(self, lat, lon):
+        """Zone index per point (-1 = no zone); the first matching zone wins"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        zone = np.full(lat.shape, -1, dtype=np.intp)
+        for i in range(len(self.shapes)):
+            unassigned = zone < 0
+            if not unassigned.any():
+                break
+            zone[unassigned & self.zone_mask(i, lat, lon)] = i
+        return zone
+
+    def count(self, lat, lon):
+        """Number of points per zone as a {name: count} dict"""
+        zone = self.classify(lat, lon)
+        counts = np.bincount(zone[zone >= 0], minlength=len(self.zone_names))
+        return dict(zip(self.zone_names, counts.tolist()))
+
+
+class ZoneGrid:
+    def __init__(self, classifier, bounds, cell_deg=DEFAULT_CELL_DEG, grid=None):
+        """
+        Rasterize a ZoneClassifier over bounds = (lat_min, lat_max, lon_min, lon_max).
+
+        Each cell holds the zone index of its centre, -1 for no zone, or
+        BOUNDARY when a zone edge passes through it.
+        """
+        self.classifier = classifier
+        self.zone_names = classifier.zone_names
+        self.bounds = tuple(float(b) for b in bounds)
+        self.cell_deg = cell_deg
+
+        lat_min, lat_max, lon_min, lon_max = self.bounds
+        self.n_rows = int(np.ceil((lat_max - lat_min) / cell_deg))
+        self.n_cols = int(np.ceil((lon_max - lon_min) / cell_deg))
+        self.grid = grid if grid is not None else self._rasterize()
+
+        self.exact_lookups = 0
+
+    def _edges(self):
+        """Zone outlines as (lon1, lat1, lon2, lat2) segments, boxes clipped to the grid bounds"""
+        lat_min, lat_max, lon_min, lon_max = self.bounds
+        segments = []
+        for shape in self.classifier.shapes:
+            if isinstance(shape, Polygon):
+                points = np.asarray(shape.points, dtype=np.float64)
+                segments.extend(np.hstack([points, np.roll(points, -1, axis=0)]))
+                continue
+            s_lat_min, s_lat_max, s_lon_min, s_lon_max = (
+                lat_min if shape[0] is None else shape[0], lat_max if shape[1] is None else shape[1],
+                lon_min if shape[2] is None else shape[2], lon_max if shape[3] is None else shape[3]
+            )
+            segments.extend([
+                (s_lon_min, s_lat_min, s_lon_max, s_lat_min), (s_lon_max, s_lat_min, s_lon_max, s_lat_max),
+                (s_lon_max, s_lat_max, s_lon_min, s_lat_max), (s_lon_min, s_lat_max, s_lon_min, s_lat_min)
+            ])
+        return np.array(segments, dtype=np.float64).reshape(-1, 4)
+
+    def _rasterize(self):
+        """Classify cell centres, then mark every cell an edge passes through"""
+        lat_min, _, lon_min, _ = self.bounds
+        centre_lat = lat_min + (np.arange(self.n_rows) + 0.5) * self.cell_deg
+        centre_lon = lon_min + (np.arange(self.n_cols) + 0.5) * self.cell_deg
+        lat, lon = np.meshgrid(centre_lat, centre_lon, indexing='ij')
+        grid = self.classifier.classify(lat, lon).astype(np.int16)
+
+        # Sample each edge at a quarter cell and mark the cells (and their neighbours) it touches
+        boundary = np.zeros(grid.shape, dtype=bool)
+        for lon1, lat1, lon2, lat2 in self._edges():
+            steps = int(np.ceil(max(abs(lon2 - lon1), abs(lat2 - lat1)) / (self.cell_deg / 4))) + 1
+            t = np.linspace(0.0, 1.0, steps)
+            rows = np.floor((lat1 + t * (lat2 - lat1) - lat_min) / self.cell_deg).astype(np.intp)
+            cols = np.floor((lon1 + t * (lon2 - lon1) - lon_min) / self.cell_deg).astype(np.intp)
+            valid = (rows >= 0) & (rows < self.n_rows) & (cols >= 0) & (cols < self.n_cols)
+            boundary[rows[valid], cols[valid]] = True
+
+        dilated = boundary.copy()
+        dilated[1:, :] |= boundary[:-1, :]
+        dilated[:-1, :] |= boundary[1:, :]
+        dilated[:, 1:] |= boundary[:, :-1]
+        dilated[:, :-1] |= boundary[:, 1:]
+        grid[dilated] = BOUNDARY
+        return grid
+
+    def classify(self, lat, lon):
+        """Zone index per point (-1 = no zone): one grid lookup, exact test on boundary cells only"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        lat_min, _, lon_min, _ = self.bounds
+
+        rows = np.floor((lat - lat_min) / self.cell_deg).astype(np.intp)
+        cols = np.floor((lon - lon_min) / self.cell_deg).astype(np.intp)
+        inside = (rows >= 0) & (rows < self.n_rows) & (cols >= 0) & (cols < self.n_cols)
+
+        zone = np.full(lat.shape, BOUNDARY, dtype=np.intp)
+        zone[inside] = self.grid[rows[inside], cols[inside]]
+
+        exact = zone == BOUNDARY
+        if exact.any():
+            zone[exact] = self.classifier.classify(lat[exact], lon[exact])
+            self.exact_lookups += int(exact.sum())
+        return zone
+
+    def count(self, lat, lon):
+        """Number of points per zone as a {name: count} dict"""
+        zone = self.classify(lat, lon)
+        counts = np.bincount(zone[zone >= 0], minlength=len(self.zone_names))
+        return dict(zip(self.zone_names, counts.tolist()))
+
+    def cache_key(self):
+        """Hash of the zones, bounds and resolution (a cached grid is only reused when they match)"""
+        digest = hashlib.sha1()
+        digest.update(repr((self.zone_names, self.bounds, self.cell_deg)).encode())
+        for shape in self.classifier.shapes:
+            digest.update(repr(shape.points if isinstance(shape, Polygon) else shape).encode())
+        return digest.hexdigest()
+
+    @classmethod
+    def cached(cls, classifier, bounds, cache_path, cell_deg=DEFAULT_CELL_DEG):
+        """Load the grid for a city from cache_path, rasterizing and saving it when missing or stale"""
+        grid = cls(classifier, bounds, cell_deg, grid=np.zeros((0, 0), dtype=np.int16))
+        key = grid.cache_key()
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as data:
+                if str(data['key']) == key:
+                    grid.grid = data['grid']
+                    return grid
+
+        grid.grid = grid._rasterize()
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        np.savez_compressed(cache_path, grid=grid.grid, key=key)
+        return grid
+
+
+def test_zone_classifier(n=100000):
+    """Compare the vectorized boxes with the per-vehicle checks and time a frame"""
+    import time
+
+    print("=" * 60)
+    print("Testing Vectorized Zone Classification")
+    print("=" * 60)
+
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(40.5, 40.95, n)
+    lon = rng.uniform(-74.1, -73.65, n)
+
+    classifier = ZoneClassifier.boroughs()
+    start = time.perf_counter()
+    counts = classifier.count(lat, lon)
+    print(f"Boxes: {counts} in {(time.perf_counter() - start) * 1000:.1f} ms for {n} points")
+
+    # Manhattan as a polygon, checked against geometry.Polygon point by point
+    manhattan = Polygon([(-74.02, 40.70), (-73.97, 40.70), (-73.93, 40.80), (-73.93, 40.88), (-74.0, 40.76)])
+    polygons = ZoneClassifier({'Manhattan': manhattan, **{k: v for k, v in BOROUGH_BOXES.items() if k != 'Manhattan'}})
+    start = time.perf_counter()
+    zone = polygons.classify(lat, lon)
+    print(f"Polygon: {(time.perf_counter() - start) * 1000:.1f} ms")
+    sample = range(2000)
+    exact = np.array([(lon[i], lat[i]) in manhattan for i in sample])
+    print(f"Matches geometry.Polygon on {len(exact)} points: {bool(np.all(exact == (zone[:2000] == 0)))}")
+
+    # Rasterized lookup grid with a detailed (400-vertex) Manhattan outline
+    angle = np.linspace(0, 2 * np.pi, 400, endpoint=False)
+    outline = np.column_stack([-73.975 + 0.03 * np.cos(angle) * (1 + 0.1 * np.sin(7 * angle)),
+                               40.78 + 0.09 * np.sin(angle)])
+    polygons = ZoneClassifier({'Manhattan': Polygon([tuple(p) for p in outline]),
+                               **{k: v for k, v in BOROUGH_BOXES.items() if k != 'Manhattan'}})
+    lat = rng.uniform(40.49, 40.92, n)
+    lon = rng.uniform(-74.27, -73.68, n)
+    start = time.perf_counter()
+    zone = polygons.classify(lat, lon)
+    print(f"\n400-vertex polygon: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    grid = ZoneGrid(polygons, (40.49, 40.92, -74.27, -73.68))
+    print(f"\nGrid {grid.n_rows}x{grid.n_cols} built in {(time.perf_counter() - start) * 1000:.0f} ms")
+    start = time.perf_counter()
+    grid_zone = grid.classify(lat, lon)
+    print(f"Grid lookup: {(time.perf_counter() - start) * 1000:.1f} ms, "
+          f"{grid.exact_lookups} exact fallbacks, identical: {bool(np.all(grid_zone == zone))}")
+    return classifier
+
+if __name__ == "__main__":
+    test_zone_classifier()